@@ -5,10 +5,28 @@ Aggressively filters and categorizes training data by expert domain.
 """
 
 import json
+import os
 import re
+import sys
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Tuple, Optional
+from contextlib import ExitStack
+from multiprocessing import Pool
+from functools import reduce
+from typing import Dict, Iterator, List, Tuple, Optional
+
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import dumps_line, json_loads
+
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.json as paj
+except ImportError:  # optional: vectorized quality pre-filter
+    pa = None
+
 
 # Domain classification keywords
 DOMAIN_KEYWORDS = {
@@ -96,6 +114,45 @@ DOMAIN_KEYWORDS = {
     }
 }
 
+# Domains in a fixed order so classify_sample can score into a flat list
+DOMAIN_LIST = list(DOMAIN_KEYWORDS)
+DOMAIN_INDEX = {domain: i for i, domain in enumerate(DOMAIN_LIST)}
+
+
+# Every distinct (lowercased) keyword mapped to the indices of the domains that
+# score it and the domains that require it, so classify_sample scans each
+# keyword once across all domains instead of once per domain.
+def _build_keyword_table() -> Tuple[Tuple[str, Tuple[int, ...], Tuple[int, ...]], ...]:
+    strong = defaultdict(list)
+    required = defaultdict(list)
+    for domain, keywords in DOMAIN_KEYWORDS.items():
+        for kw in keywords["strong"]:
+            strong[kw.lower()].append(DOMAIN_INDEX[domain])
+        for req in keywords["required"]:
+            required[req.lower()].append(DOMAIN_INDEX[domain])
+    return tuple(
+        (kw, tuple(strong.get(kw, ())), tuple(required.get(kw, ())))
+        for kw in dict.fromkeys([*strong, *required])
+    )
+
+
+KEYWORD_TABLE = _build_keyword_table()
+REQUIRED_DOMAINS = tuple(
+    DOMAIN_INDEX[domain]
+    for domain, keywords in DOMAIN_KEYWORDS.items()
+    if keywords["required"]
+)
+
+# Code patterns compiled once per domain; each pattern still scores independently
+COMPILED_PATTERNS = {
+    domain: [re.compile(pattern, re.IGNORECASE) for pattern in keywords["code_patterns"]]
+    for domain, keywords in DOMAIN_KEYWORDS.items()
+}
+
+# Substrings that mark an output as containing ASM-like content
+ASM_INDICATORS = ("$", "LDA", "STA", "JSR", "JSL", "RTS", "RTL", "#$", "db ", "dw ")
+ASM_INDICATORS_BYTES = tuple(ind.encode() for ind in ASM_INDICATORS)
+
 # System prompts for each expert
 SYSTEM_PROMPTS = {
     "farore_debug": """You are Farore, a 65816 assembly debugging expert for SNES ROM hacking.
@@ -186,34 +243,49 @@ When providing solutions:
 4. Explain include order requirements"""
 }
 
+# System prompt per domain resolved once (unknown domains use Nayru's)
+PROMPT_BY_DOMAIN = {
+    domain: SYSTEM_PROMPTS.get(domain, SYSTEM_PROMPTS["nayru_codegen"])
+    for domain in [*DOMAIN_KEYWORDS, "general"]
+}
 
-def classify_sample(text: str) -> Tuple[str, float]:
-    """Classify a sample into a domain with confidence score."""
-    text_lower = text.lower()
-    scores = defaultdict(float)
-
-    for domain, keywords in DOMAIN_KEYWORDS.items():
-        # Check strong keywords
-        for kw in keywords["strong"]:
-            if kw.lower() in text_lower:
-                scores[domain] += 2.0
-
-        # Check code patterns
-        for pattern in keywords["code_patterns"]:
-            if re.search(pattern, text, re.IGNORECASE):
-                scores[domain] += 3.0
-
-        # Check required keywords (must have at least one)
-        if keywords["required"]:
-            has_required = any(req.lower() in text_lower for req in keywords["required"])
-            if not has_required:
-                scores[domain] = 0  # Disqualify if missing required
 
-    if not scores:
-        return "general", 0.0
+def classify_sample(text: str, is_lower: bool = False) -> Tuple[str, float]:
+    """Classify a sample into a domain with confidence score.
+
+    Pass ``is_lower=True`` when ``text`` is already lowercased to skip the
+    copy; code patterns are case-insensitive, so they run on the lowercased
+    text too.
+    """
+    text_lower = text if is_lower else text.lower()
+    scores = [0.0] * len(DOMAIN_LIST)
+    matched_required = set()
+
+    # Strong and required keywords in a single pass over all domains
+    for kw, strong_domains, required_domains in KEYWORD_TABLE:
+        if kw in text_lower:
+            for idx in strong_domains:
+                scores[idx] += 2.0
+            matched_required.update(required_domains)
+
+    # Required keywords (must have at least one)
+    disqualified = set()
+    for idx in REQUIRED_DOMAINS:
+        if idx not in matched_required:
+            scores[idx] = 0.0  # Disqualify if missing required
+            disqualified.add(idx)
+
+    # Check code patterns (skipping domains that can no longer score)
+    for idx, domain in enumerate(DOMAIN_LIST):
+        if idx in disqualified:
+            continue
+        for pattern in COMPILED_PATTERNS[domain]:
+            if pattern.search(text_lower):
+                scores[idx] += 3.0
 
-    best_domain = max(scores, key=scores.get)
-    confidence = scores[best_domain] / 10.0  # Normalize to 0-1 range
+    best_score = max(scores)
+    best_domain = DOMAIN_LIST[scores.index(best_score)]
+    confidence = best_score / 10.0  # Normalize to 0-1 range
     return best_domain, min(confidence, 1.0)
 
 
@@ -231,15 +303,73 @@ def is_high_quality(sample: dict) -> bool:
         return False
 
     # Should contain ASM-like content
-    asm_indicators = ["$", "LDA", "STA", "JSR", "JSL", "RTS", "RTL", "#$", "db ", "dw "]
-    has_asm = any(ind in output for ind in asm_indicators)
+    has_asm = any(ind in output for ind in ASM_INDICATORS)
 
     return has_asm
 
 
+# Bytes of JSONL parsed per Arrow record batch, which bounds the reader's memory
+ARROW_BLOCK_SIZE = 4 << 20
+
+
+def _high_quality_batches_arrow(filepath: Path) -> Iterator[Tuple[int, List[dict]]]:
+    """Apply is_high_quality to a file as Arrow column operations, one record batch at a time.
+
+    Yields (records read, rows kept) per batch. Raises an Arrow error when a
+    batch can't be read as a flat string table (bad lines, mixed types, a
+    field not seen in earlier batches).
+    """
+    reader = paj.open_json(filepath, read_options=paj.ReadOptions(block_size=ARROW_BLOCK_SIZE))
+    for batch in reader:
+        if "output" not in batch.schema.names or "instruction" not in batch.schema.names:
+            yield batch.num_rows, []
+            continue
+        output = pc.fill_null(batch.column("output"), "")
+        instruction = pc.fill_null(batch.column("instruction"), "")
+        mask = pc.and_(
+            pc.greater_equal(pc.utf8_length(output), 50),
+            pc.greater_equal(pc.utf8_length(instruction), 10),
+        )
+        has_asm = reduce(pc.or_, (pc.match_substring(output, ind) for ind in ASM_INDICATORS))
+        yield batch.num_rows, batch.filter(pc.and_(mask, has_asm)).to_pylist()
+
+
+def iter_high_quality_samples(filepath: Path) -> Iterator[dict]:
+    """Yield the samples of a JSONL file that pass is_high_quality."""
+    records_read = 0
+    if pa is not None:
+        try:
+            for num_records, rows in _high_quality_batches_arrow(filepath):
+                yield from rows
+                records_read += num_records
+            return
+        except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError):
+            pass  # parse the rest of the file line by line
+
+    with open(filepath, "rb") as f:
+        for line in f:
+            # Skip the records the Arrow reader already handled (it ignores blank lines)
+            if records_read:
+                if line.strip():
+                    records_read -= 1
+                continue
+            # Cheap necessary conditions on the raw bytes before parsing: the
+            # output (>= 50 chars) and instruction (>= 10) can't fit in fewer
+            # bytes, and an ASM indicator must appear somewhere in the line.
+            if len(line) < 60 or not any(ind in line for ind in ASM_INDICATORS_BYTES):
+                continue
+            try:
+                sample = json_loads(line)
+            except json.JSONDecodeError:
+                continue
+
+            if is_high_quality(sample):
+                yield sample
+
+
 def convert_to_chatml(sample: dict, domain: str) -> dict:
     """Convert sample to ChatML format with appropriate system prompt."""
-    system_prompt = SYSTEM_PROMPTS.get(domain, SYSTEM_PROMPTS["nayru_codegen"])
+    system_prompt = PROMPT_BY_DOMAIN.get(domain) or SYSTEM_PROMPTS["nayru_codegen"]
 
     messages = [
         {"role": "system", "content": system_prompt}
@@ -266,54 +396,68 @@ def convert_to_chatml(sample: dict, domain: str) -> dict:
 def process_file(filepath: Path) -> Dict[str, List[dict]]:
     """Process a JSONL file and categorize samples by domain."""
     categorized = defaultdict(list)
-
-    with open(filepath) as f:
-        for line in f:
-            try:
-                sample = json.loads(line.strip())
-            except json.JSONDecodeError:
-                continue
-
-            if not is_high_quality(sample):
-                continue
-
-            # Combine all text for classification
-            text = " ".join([
-                sample.get("instruction", ""),
-                sample.get("input", ""),
-                sample.get("output", "")
-            ])
-
-            domain, confidence = classify_sample(text)
-
-            if confidence >= 0.3:  # Minimum confidence threshold
-                chatml = convert_to_chatml(sample, domain)
-                chatml["_meta"] = {
-                    "source": filepath.name,
-                    "domain": domain,
-                    "confidence": confidence
-                }
-                categorized[domain].append(chatml)
+    source = filepath.name
+
+    for sample in iter_high_quality_samples(filepath):
+        # Combine all text for classification (Arrow rows carry None for
+        # fields missing from a line); only the lowercased copy is kept
+        text_lower = " ".join([
+            sample.get("instruction") or "",
+            sample.get("input") or "",
+            sample.get("output") or ""
+        ]).lower()
+
+        domain, confidence = classify_sample(text_lower, is_lower=True)
+
+        if confidence >= 0.3:  # Minimum confidence threshold
+            chatml = convert_to_chatml(sample, domain)
+            chatml["_meta"] = {
+                "source": source,
+                "domain": domain,
+                "confidence": confidence
+            }
+            categorized[domain].append(chatml)
 
     return categorized
 
 
-def resolve_dataset_path(datasets_dir: Path, filename: str) -> Path | None:
-    """Locate a dataset file across common dataset subfolders."""
-    search_roots = [
+def dataset_search_roots(datasets_dir: Path) -> List[Path]:
+    """Dataset subfolders to search, in priority order."""
+    return [
         datasets_dir,
         datasets_dir / "sources",
         datasets_dir / "archive" / "intermediate",
         datasets_dir / "archive",
         datasets_dir / "jsonl",
     ]
-    for root in search_roots:
+
+
+def resolve_dataset_path(datasets_dir: Path, filename: str) -> Path | None:
+    """Locate a dataset file across common dataset subfolders."""
+    for root in dataset_search_roots(datasets_dir):
         candidate = root / filename
         if candidate.exists():
             return candidate
     return None
 
 
+def index_dataset_paths(datasets_dir: Path) -> Dict[str, Path]:
+    """Map file names to paths with one directory listing per search root.
+
+    Earlier roots win, matching resolve_dataset_path, but without a stat()
+    per (root, filename) pair.
+    """
+    index = {}
+    for root in dataset_search_roots(datasets_dir):
+        try:
+            with os.scandir(root) as entries:
+                for entry in entries:
+                    index.setdefault(entry.name, root / entry.name)
+        except OSError:
+            continue
+    return index
+
+
 def main():
     datasets_dir = Path.home() / "src/training/datasets"
     output_dir = Path.home() / "src/lab/afs/training_data/filtered"
@@ -331,37 +475,45 @@ def main():
         "asm_analysis_structured_20251231_212609.jsonl",
     ]
 
-    all_categorized = defaultdict(list)
-
+    dataset_index = index_dataset_paths(datasets_dir)
+    filepaths = []
     for filename in priority_files:
-        filepath = resolve_dataset_path(datasets_dir, filename)
+        filepath = dataset_index.get(filename)
         if not filepath:
             print(f"Skipping {filename} (not found)")
             continue
-
-        print(f"Processing {filename}...")
-        categorized = process_file(filepath)
-
-        for domain, samples in categorized.items():
-            all_categorized[domain].extend(samples)
-            print(f"  {domain}: {len(samples)} samples")
-
-    # Write filtered datasets
-    print("\n=== Writing filtered datasets ===")
-    for domain, samples in all_categorized.items():
-        output_file = output_dir / f"{domain}_filtered.jsonl"
-        with open(output_file, "w") as f:
-            for sample in samples:
-                f.write(json.dumps(sample) + "\n")
-        print(f"{domain}: {len(samples)} samples -> {output_file.name}")
+        filepaths.append(filepath)
+
+    # Files are independent and classification is CPU-bound, so fan out
+    # across processes; imap keeps results (and output order) in file order.
+    # Each file's samples are written as soon as it finishes so only
+    # per-domain counts stay in memory.
+    domain_counts = defaultdict(int)
+    processes = max(1, min(len(filepaths), os.cpu_count() or 1))
+    with ExitStack() as stack:
+        writers = {}
+        pool = stack.enter_context(Pool(processes))
+        for filepath, categorized in zip(filepaths, pool.imap(process_file, filepaths)):
+            print(f"Processed {filepath.name}")
+            for domain, samples in categorized.items():
+                writer = writers.get(domain)
+                if writer is None:
+                    output_file = output_dir / f"{domain}_filtered.jsonl"
+                    writer = writers[domain] = stack.enter_context(open(output_file, "wb"))
+                writer.writelines(dumps_line(sample) for sample in samples)
+                domain_counts[domain] += len(samples)
+                print(f"  {domain}: {len(samples)} samples")
+
+    print("\n=== Filtered datasets ===")
+    for domain, count in domain_counts.items():
+        print(f"{domain}: {count} samples -> {domain}_filtered.jsonl")
 
     # Summary
     print("\n=== Summary ===")
-    total = sum(len(s) for s in all_categorized.values())
+    total = sum(domain_counts.values())
     print(f"Total high-quality samples: {total}")
-    for domain, samples in sorted(all_categorized.items(), key=lambda x: -len(x[1])):
-        print(f"  {domain}: {len(samples)}")
-
+    for domain, count in sorted(domain_counts.items(), key=lambda x: -x[1]):
+        print(f"  {domain}: {count}")
 
 if __name__ == "__main__":
     main()
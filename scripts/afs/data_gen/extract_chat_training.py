@@ -9,10 +9,22 @@ Filters for:
 """
 
 import json
+import sys
+import random
 from pathlib import Path
 from datetime import datetime
 import re
 
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import dumps_line, json_loads
+
+try:
+    import numpy as np
+except ImportError:  # optional: vectorized MinHash signatures
+    np = None
+
+
 DATASETS_DIR = Path.home() / "src/training/datasets"
 OUTPUT_DIR = Path.home() / ".context/training_pools"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
@@ -37,10 +49,34 @@ DEBUG_KEYWORDS = [
 
 QUALITY_THRESHOLD = 0.7
 
-def matches_keywords(text: str, keywords: list[str]) -> bool:
-    """Check if text contains any keywords."""
-    text_lower = text.lower()
-    return any(kw.lower() in text_lower for kw in keywords)
+# Near-duplicate detection: MinHash over word shingles with banded LSH.
+# 16 bands x 8 rows puts the LSH candidate curve well below the threshold;
+# candidates are then confirmed against the full signature.
+DEDUPE_THRESHOLD = 0.85
+SHINGLE_SIZE = 5
+MINHASH_BANDS = 16
+MINHASH_ROWS = 8
+_MINHASH_PRIME = (1 << 61) - 1
+_perm_rng = random.Random(0)
+MINHASH_PERMUTATIONS = [
+    (_perm_rng.randrange(1, _MINHASH_PRIME), _perm_rng.randrange(0, _MINHASH_PRIME))
+    for _ in range(MINHASH_BANDS * MINHASH_ROWS)
+]
+if np is not None:
+    # (a * h + b) % p doesn't fit in uint64, so the NumPy path uses the
+    # multiply-shift family instead: the high 32 bits of a * h + b, wrapping
+    # mod 2**64, with odd 64-bit a. Signatures are only compared within a run.
+    _shift_rng = random.Random(1)
+    _SHIFT_A = np.array(
+        [_shift_rng.getrandbits(64) | 1 for _ in range(MINHASH_BANDS * MINHASH_ROWS)], dtype=np.uint64
+    )[:, None]
+    _SHIFT_B = np.array(
+        [_shift_rng.getrandbits(64) for _ in range(MINHASH_BANDS * MINHASH_ROWS)], dtype=np.uint64
+    )[:, None]
+
+def matches_keywords(text_lower: str, keywords: list[str]) -> bool:
+    """Check if already-lowercased text contains any (lowercase) keywords."""
+    return any(kw in text_lower for kw in keywords)
 
 def extract_samples(jsonl_path: Path, domain: str) -> tuple[list, list, list]:
     """Extract samples by category from JSONL file."""
@@ -48,12 +84,12 @@ def extract_samples(jsonl_path: Path, domain: str) -> tuple[list, list, list]:
     oos_samples = []
     debug_samples = []
 
-    with open(jsonl_path) as f:
+    with open(jsonl_path, "rb") as f:
         for line in f:
             if not line.strip():
                 continue
             try:
-                sample = json.loads(line)
+                sample = json_loads(line)
             except json.JSONDecodeError:
                 continue
 
@@ -62,24 +98,88 @@ def extract_samples(jsonl_path: Path, domain: str) -> tuple[list, list, list]:
             if quality < QUALITY_THRESHOLD:
                 continue
 
-            # Combine text for matching
-            text = " ".join([
+            # Combine text for matching (lowercased once for all categories)
+            text_lower = " ".join([
                 sample.get("instruction", ""),
                 sample.get("output", ""),
                 sample.get("input", "")
-            ])
+            ]).lower()
 
             # Categorize
-            if matches_keywords(text, OOS_KEYWORDS):
+            if matches_keywords(text_lower, OOS_KEYWORDS):
                 oos_samples.append(sample)
-            elif matches_keywords(text, ASM_KEYWORDS):
+            elif matches_keywords(text_lower, ASM_KEYWORDS):
                 asm_samples.append(sample)
 
-            if matches_keywords(text, DEBUG_KEYWORDS):
+            if matches_keywords(text_lower, DEBUG_KEYWORDS):
                 debug_samples.append(sample)
 
     return asm_samples, oos_samples, debug_samples
 
+def shingle_hashes(text: str) -> set[int]:
+    """Hash the word shingles of a text (per-process hashes, stable within a run)."""
+    words = text.lower().split()
+    if len(words) <= SHINGLE_SIZE:
+        return {hash(" ".join(words))}
+    return {
+        hash(" ".join(words[i:i + SHINGLE_SIZE]))
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    }
+
+def minhash_signature(hashes: set[int]) -> tuple[int, ...]:
+    """Compute the MinHash signature of a set of shingle hashes."""
+    if np is not None:
+        # str hashes are signed 64-bit; reinterpret them as uint64
+        h = np.fromiter(hashes, dtype=np.int64, count=len(hashes)).view(np.uint64)
+        mins = ((_SHIFT_A * h + _SHIFT_B) >> np.uint64(32)).min(axis=1)
+        return tuple(mins.tolist())
+    return tuple(
+        min((a * h + b) % _MINHASH_PRIME for h in hashes)
+        for a, b in MINHASH_PERMUTATIONS
+    )
+
+def signature_similarity(sig_a: tuple[int, ...], sig_b: tuple[int, ...]) -> float:
+    """Estimate Jaccard similarity from two MinHash signatures."""
+    return sum(x == y for x, y in zip(sig_a, sig_b)) / len(sig_a)
+
+def dedupe(samples: list) -> list:
+    """Drop near-duplicate samples by instruction + output content.
+
+    Signatures take about 1 ms per 500-word sample with numpy and tens of ms
+    without it (pip install 'afs_scawful[data_gen]').
+    """
+    buckets = [{} for _ in range(MINHASH_BANDS)]
+    kept_signatures = []
+    result = []
+    for s in samples:
+        instruction = s.get("instruction", "")
+        if not instruction:
+            continue
+
+        signature = minhash_signature(
+            shingle_hashes(f"{instruction} {s.get('output', '')}")
+        )
+        bands = [
+            signature[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS]
+            for i in range(MINHASH_BANDS)
+        ]
+
+        candidates = set()
+        for bucket, band in zip(buckets, bands):
+            candidates.update(bucket.get(band, ()))
+        if any(
+            signature_similarity(signature, kept_signatures[idx]) >= DEDUPE_THRESHOLD
+            for idx in candidates
+        ):
+            continue
+
+        idx = len(kept_signatures)
+        kept_signatures.append(signature)
+        result.append(s)
+        for bucket, band in zip(buckets, bands):
+            bucket.setdefault(band, []).append(idx)
+    return result
+
 def format_for_training(sample: dict, expert: str) -> dict:
     """Format sample for expert training."""
     return {
@@ -125,17 +225,10 @@ def main():
         all_debug.extend(debug)
         print(f"  ASM: {len(asm)}, OoS: {len(oos)}, Debug: {len(debug)}")
 
-    # Deduplicate by instruction
-    def dedupe(samples: list) -> list:
-        seen = set()
-        result = []
-        for s in samples:
-            key = s.get("instruction", "")[:100]
-            if key and key not in seen:
-                seen.add(key)
-                result.append(s)
-        return result
-
+    # Drop near-duplicates (MinHash-LSH over instruction + output)
+    if np is None:
+        print("\nWarning: numpy not installed; MinHash dedupe falls back to slow pure Python")
+        print("  (pip install 'afs_scawful[data_gen]')")
     all_asm = dedupe(all_asm)
     all_oos = dedupe(all_oos)
     all_debug = dedupe(all_debug)
@@ -164,9 +257,9 @@ def main():
 
     for filename, samples in outputs:
         path = OUTPUT_DIR / filename
-        with open(path, "w") as f:
+        with open(path, "wb") as f:
             for sample in samples:
-                f.write(json.dumps(sample) + "\n")
+                f.write(dumps_line(sample))
         print(f"Saved {len(samples)} samples to {path}")
 
     # Summary
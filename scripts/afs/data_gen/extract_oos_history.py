@@ -17,6 +17,21 @@ OOS_REPO = Path.home() / "src/hobby/oracle-of-secrets"
 OUTPUT_DIR = Path.home() / ".context/training_pools"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# git log --grep patterns (case-sensitive literals) for each commit category
+BUGFIX_GREPS = ["Fix"]
+FEATURE_GREPS = ["Add", "Implement", "feat"]
+
+# categorize_commit word groups, checked in order (first match wins)
+COMMIT_CATEGORY_WORDS = (
+    ("bugfix", ("fix", "bug", "crash", "issue", "regression")),
+    ("feature", ("add", "implement", "feat", "new")),
+    ("refactor", ("refactor", "clean", "optimize")),
+    ("docs", ("doc", "update", "readme")),
+)
+
+# A changed-file line ending in .asm, without its leading whitespace
+ASM_FILE_LINE_RE = re.compile(r"^[^\S\n]*(.*\.asm)$", re.MULTILINE)
+
 def run_git(args: list[str], cwd: Path = OOS_REPO) -> str:
     """Run git command and return output."""
     result = subprocess.run(
@@ -27,26 +42,36 @@ def run_git(args: list[str], cwd: Path = OOS_REPO) -> str:
     )
     return result.stdout.strip()
 
-def get_commits(since: str = "2023-01-01", grep: str | None = None) -> list[dict]:
-    """Get commits with metadata."""
-    args = ["log", f"--since={since}", "--format=%H|%ai|%s"]
-    if grep:
-        args.extend(["--grep", grep])
+def get_commits(since: str = "2023-01-01", grep: str | list[str] | None = None) -> list[dict]:
+    """Get commits with metadata.
+
+    Multiple ``grep`` patterns are OR'd by git in a single history walk;
+    ``body`` carries the full message so callers can tell which matched.
+    """
+    args = ["log", f"--since={since}", "--format=%H%x1f%ai%x1f%s%x1f%B%x1e"]
+    if isinstance(grep, str):
+        grep = [grep]
+    for pattern in grep or []:
+        args.extend(["--grep", pattern])
 
     output = run_git(args)
     commits = []
-    for line in output.split("\n"):
-        if not line:
-            continue
-        parts = line.split("|", 2)
-        if len(parts) == 3:
+    for record in output.split("\x1e"):
+        parts = record.strip("\n").split("\x1f", 3)
+        if len(parts) == 4:
             commits.append({
                 "hash": parts[0],
                 "date": parts[1],
-                "message": parts[2]
+                "message": parts[2],
+                "body": parts[3],
             })
     return commits
 
+def count_commits(since: str = "2023-01-01") -> int:
+    """Count commits since a date without formatting them."""
+    output = run_git(["rev-list", "--count", f"--since={since}", "HEAD"])
+    return int(output) if output.isdigit() else 0
+
 def get_commit_diff(commit_hash: str, name_only: bool = False) -> str:
     """Get diff for a commit."""
     args = ["show", commit_hash]
@@ -56,38 +81,50 @@ def get_commit_diff(commit_hash: str, name_only: bool = False) -> str:
         args.extend(["--format=", "-p"])
     return run_git(args)
 
+def get_commit_diffs(commit_hashes: list[str]) -> dict[str, tuple[str, str]]:
+    """Get (changed file names, patch) for many commits with one git call.
+
+    Equivalent to ``get_commit_diff(h, name_only=True)`` and
+    ``get_commit_diff(h)`` for every hash, but parsed from a single
+    ``git show --raw -p`` stream split on a NUL sentinel per commit.
+    """
+    if not commit_hashes:
+        return {}
+
+    output = run_git(["show", "--format=%x00%H", "--raw", "-p", *commit_hashes])
+    diffs = {}
+    for block in output.split("\x00")[1:]:
+        commit_hash, _, body = block.partition("\n")
+        lines = body.split("\n")
+        names = []
+        i = 0
+        # Raw lines (":<modes> <shas> <status>\t<path>") precede the patch
+        while i < len(lines) and (not lines[i] or lines[i].startswith(":")):
+            if lines[i]:
+                names.append(lines[i].rsplit("\t", 1)[-1])
+            i += 1
+        diffs[commit_hash] = ("\n".join(names), "\n".join(lines[i:]).strip())
+    return diffs
+
 def categorize_commit(message: str) -> str:
     """Categorize commit by type."""
     msg_lower = message.lower()
-    if any(word in msg_lower for word in ["fix", "bug", "crash", "issue", "regression"]):
-        return "bugfix"
-    elif any(word in msg_lower for word in ["add", "implement", "feat", "new"]):
-        return "feature"
-    elif any(word in msg_lower for word in ["refactor", "clean", "optimize"]):
-        return "refactor"
-    elif any(word in msg_lower for word in ["doc", "update", "readme"]):
-        return "docs"
-    else:
-        return "other"
+    for category, words in COMMIT_CATEGORY_WORDS:
+        if any(word in msg_lower for word in words):
+            return category
+    return "other"
 
 def extract_asm_files_changed(diff_output: str) -> list[str]:
     """Extract .asm files from diff."""
-    files = []
-    for line in diff_output.split("\n"):
-        if line.endswith(".asm"):
-            files.append(line.strip())
-    return files
+    return ASM_FILE_LINE_RE.findall(diff_output)
 
-def create_bugfix_sample(commit: dict, diff: str) -> dict | None:
+def create_bugfix_sample(commit: dict, files_changed: str, code_diff: str) -> dict | None:
     """Create training sample for Farore (debugging)."""
     # Extract what was fixed
-    asm_files = extract_asm_files_changed(get_commit_diff(commit["hash"], name_only=True))
+    asm_files = extract_asm_files_changed(files_changed)
     if not asm_files:
         return None
 
-    # Get the actual code changes
-    code_diff = get_commit_diff(commit["hash"])
-
     # Truncate if too long
     if len(code_diff) > 8000:
         code_diff = code_diff[:8000] + "\n... [truncated]"
@@ -107,13 +144,12 @@ def create_bugfix_sample(commit: dict, diff: str) -> dict | None:
         }
     }
 
-def create_feature_sample(commit: dict, diff: str) -> dict | None:
+def create_feature_sample(commit: dict, files_changed: str, code_diff: str) -> dict | None:
     """Create training sample for OoS specialist."""
-    asm_files = extract_asm_files_changed(get_commit_diff(commit["hash"], name_only=True))
+    asm_files = extract_asm_files_changed(files_changed)
     if not asm_files:
         return None
 
-    code_diff = get_commit_diff(commit["hash"])
     if len(code_diff) > 8000:
         code_diff = code_diff[:8000] + "\n... [truncated]"
 
@@ -135,25 +171,38 @@ def create_feature_sample(commit: dict, diff: str) -> dict | None:
 def main():
     print("Extracting Oracle of Secrets git history...")
 
-    # Get bug fix commits
-    bugfix_commits = get_commits(grep="Fix")
+    # Walk history once for both categories, then split the same way git's
+    # --grep did (a commit may land in both lists)
+    commits = get_commits(grep=BUGFIX_GREPS + FEATURE_GREPS)
+    bugfix_commits = [
+        c for c in commits if any(p in c["body"] for p in BUGFIX_GREPS)
+    ]
     print(f"Found {len(bugfix_commits)} bug fix commits")
 
-    # Get feature commits
-    feature_commits = get_commits(grep="Add\\|Implement\\|feat")
+    feature_commits = [
+        c for c in commits if any(p in c["body"] for p in FEATURE_GREPS)
+    ]
     print(f"Found {len(feature_commits)} feature commits")
 
+    bugfix_commits_used = bugfix_commits[:50]  # Limit to 50 most recent
+    feature_commits_used = feature_commits[:50]
+
+    # Fetch every diff we need in one git call instead of two per commit
+    diffs = get_commit_diffs(list(dict.fromkeys(
+        c["hash"] for c in bugfix_commits_used + feature_commits_used
+    )))
+
     # Create samples
     bugfix_samples = []
     feature_samples = []
 
-    for commit in bugfix_commits[:50]:  # Limit to 50 most recent
-        sample = create_bugfix_sample(commit, "")
+    for commit in bugfix_commits_used:
+        sample = create_bugfix_sample(commit, *diffs.get(commit["hash"], ("", "")))
         if sample:
             bugfix_samples.append(sample)
 
-    for commit in feature_commits[:50]:
-        sample = create_feature_sample(commit, "")
+    for commit in feature_commits_used:
+        sample = create_feature_sample(commit, *diffs.get(commit["hash"], ("", "")))
         if sample:
             feature_samples.append(sample)
 
@@ -179,7 +228,7 @@ def main():
     # Create timeline summary
     timeline = {
         "project": "Oracle of Secrets",
-        "total_commits": len(get_commits(since="2022-01-01")),
+        "total_commits": count_commits(since="2022-01-01"),
         "bugfix_commits": len(bugfix_commits),
         "feature_commits": len(feature_commits),
         "extracted_at": datetime.now().isoformat(),
@@ -4,10 +4,29 @@ Synthetic Training Example Generator
 Generates high-quality synthetic examples for under-represented domains.
 """
 
-import json
+import queue
 import random
+import re
+import string
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import cycle, islice
 from pathlib import Path
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, NamedTuple
+
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import dumps_bytes, dumps_line
+
+
+# Large enough to hold a whole generator's output, so it's written in one flush
+WRITE_BUFFER_SIZE = 1 << 20
+# Samples generated ahead of the writer thread
+WRITE_QUEUE_SIZE = 32
+
+OUTPUT_DIR = Path.home() / "src/lab/afs/training_data/synthetic"
 
 # System prompts from distill_training_data.py
 SYSTEM_PROMPTS = {
@@ -72,6 +91,52 @@ When providing solutions:
 4. Explain include order requirements"""
 }
 
+# System messages shared by every sample of a domain, plus their JSON encoding
+# so dumps_sample_line doesn't re-encode the long prompt for each record
+SYSTEM_MESSAGES = {
+    domain: {"role": "system", "content": prompt}
+    for domain, prompt in SYSTEM_PROMPTS.items()
+}
+SYSTEM_MESSAGES_JSON = {
+    domain: dumps_bytes(message) for domain, message in SYSTEM_MESSAGES.items()
+}
+
+# Per-domain _meta, likewise shared by reference (samples are never mutated)
+SAMPLE_META = {
+    domain: {
+        "source": "synthetic_generation",
+        "domain": domain,
+        "confidence": 1.0,
+        "synthetic": True
+    }
+    for domain in SYSTEM_PROMPTS
+}
+SAMPLE_META_JSON = {
+    domain: dumps_bytes(meta) for domain, meta in SAMPLE_META.items()
+}
+
+
+def dumps_sample_line(sample: Dict) -> bytes:
+    """dumps_line for a chat sample, splicing in the pre-encoded system message and _meta."""
+    messages = sample["messages"]
+    meta = sample["_meta"]
+    domain = meta["domain"]
+    if (
+        not messages
+        or messages[0] is not SYSTEM_MESSAGES.get(domain)
+        or meta is not SAMPLE_META[domain]
+    ):
+        return dumps_line(sample)
+    parts = [b'{"messages":[', SYSTEM_MESSAGES_JSON[domain]]
+    for message in messages[1:]:
+        parts.append(b",")
+        parts.append(dumps_bytes(message))
+    parts.append(b'],"_meta":')
+    parts.append(SAMPLE_META_JSON[domain])
+    parts.append(b"}\n")
+    return b"".join(parts)
+
+
 # Agahnim build/integration templates
 AGAHNIM_TEMPLATES = [
     {
@@ -488,10 +553,71 @@ ZSO_CustomHook:
 ]
 
 
-def generate_agahnim_samples(count: int = 350) -> List[Dict]:
-    """Generate synthetic Agahnim (build) examples."""
-    samples = []
+def _parse_template_text(text: str) -> tuple[str, frozenset]:
+    """Return (text, placeholder names); placeholder-free text comes back rendered."""
+    fields = frozenset(name for _, name, _, _ in string.Formatter().parse(text) if name)
+    return (text, fields) if fields else (text.format(), fields)
+
+
+class Template(NamedTuple):
+    """A template with its placeholder names parsed once at import."""
+    instruction: str
+    instruction_fields: frozenset
+    thinking_prefix: str  # "<thinking>" block to put before the output, or ""
+    output: str
+    output_fields: frozenset
+
+
+def _thinking_prefix(template: Dict[str, str]) -> str:
+    """Return the assistant-message prefix for a template's "thinking", if any."""
+    thinking = template.get("thinking", "")
+    return f"<thinking>\n{thinking}\n</thinking>\n\n" if thinking else ""
 
+
+def _parse_template(template: Dict[str, str]) -> Template:
+    """Convert a template dict to a Template."""
+    return Template(
+        *_parse_template_text(template["instruction"]),
+        _thinking_prefix(template),
+        *_parse_template_text(template["output"]),
+    )
+
+
+AGAHNIM_TEMPLATES_PARSED = tuple(_parse_template(t) for t in AGAHNIM_TEMPLATES)
+# Placeholder names used anywhere in each Agahnim template, in a fixed order
+AGAHNIM_TEMPLATE_FIELDS = tuple(
+    tuple(sorted(t.instruction_fields | t.output_fields)) for t in AGAHNIM_TEMPLATES_PARSED
+)
+
+
+@lru_cache(maxsize=4096)
+def render_agahnim_template(index: int, values: tuple[str, ...]) -> tuple[str, str]:
+    """Render (instruction, output) of one Agahnim template.
+
+    ``values`` line up with ``AGAHNIM_TEMPLATE_FIELDS[index]``, so samples
+    that differ only in placeholders the template doesn't use share a cache
+    entry; with few choices per placeholder most renders are cache hits.
+    """
+    template = AGAHNIM_TEMPLATES_PARSED[index]
+    subs = dict(zip(AGAHNIM_TEMPLATE_FIELDS[index], values))
+    instruction = template.instruction
+    if template.instruction_fields:
+        instruction = instruction.format(**subs)
+    output = template.output
+    if template.output_fields:
+        output = output.format(**subs)
+    return instruction, output
+
+# Majora templates are used verbatim (placeholders are replaced by name, not
+# .format()'d), so their text is kept as-is with no fields
+MAJORA_TEMPLATES_PARSED = tuple(
+    Template(t["instruction"], frozenset(), _thinking_prefix(t), t["output"], frozenset())
+    for t in MAJORA_TEMPLATES
+)
+
+
+def generate_agahnim_samples(count: int = 350) -> Iterator[Dict]:
+    """Generate synthetic Agahnim (build) examples."""
     # Common substitutions for variety
     addresses = ["$00F000", "$00ABCD", "$00D7A2", "$008234", "$00C45F"]
     routine_names = ["MyCustomHook", "NewFeatureCode", "CustomHandler", "PatchRoutine", "ExtendedLogic"]
@@ -504,128 +630,173 @@ def generate_agahnim_samples(count: int = 350) -> List[Dict]:
     ]
     mask_names = ["Bunny", "Stone", "Giant", "Skull", "Truth"]
 
-    for template in AGAHNIM_TEMPLATES * (count // len(AGAHNIM_TEMPLATES) + 1):
-        if len(samples) >= count:
-            break
-
-        # Substitute placeholders
-        instruction = template["instruction"].format(
-            address=random.choice(addresses),
-            routine_name=random.choice(routine_names),
-            namespace=random.choice(namespaces),
-            routine_a=random.choice(routine_pairs)[0],
-            routine_b=random.choice(routine_pairs)[1]
+    # Draw every placeholder value for the run up front, one RNG call per
+    # field; routine_a/routine_b come from the same pair
+    substitutions = [
+        {
+            "address": address,
+            "routine_name": routine_name,
+            "namespace": namespace,
+            "routine_a": routine_a,
+            "routine_b": routine_b,
+        }
+        for address, routine_name, namespace, (routine_a, routine_b) in zip(
+            random.choices(addresses, k=count),
+            random.choices(routine_names, k=count),
+            random.choices(namespaces, k=count),
+            random.choices(routine_pairs, k=count),
         )
+    ]
 
-        output = template["output"].format(
-            address=random.choice(addresses),
-            routine_name=random.choice(routine_names),
-            namespace=random.choice(namespaces),
-            routine_a=random.choice(routine_pairs)[0],
-            routine_b=random.choice(routine_pairs)[1]
+    # Identical across samples, so one system message and _meta are shared by all of them
+    system_message = SYSTEM_MESSAGES["agahnim_build"]
+    meta = SAMPLE_META["agahnim_build"]
+
+    template_indices = islice(cycle(range(len(AGAHNIM_TEMPLATES_PARSED))), count)
+    for index, subs in zip(template_indices, substitutions):
+        template = AGAHNIM_TEMPLATES_PARSED[index]
+        # Instruction and output share one substitution so they describe
+        # the same address/routine/namespace
+        instruction, output = render_agahnim_template(
+            index, tuple(subs[name] for name in AGAHNIM_TEMPLATE_FIELDS[index])
         )
 
-        thinking = template.get("thinking", "")
-
         messages = [
-            {"role": "system", "content": SYSTEM_PROMPTS["agahnim_build"]},
+            system_message,
             {"role": "user", "content": instruction}
         ]
 
-        assistant_content = f"<thinking>\n{thinking}\n</thinking>\n\n{output}" if thinking else output
-        messages.append({"role": "assistant", "content": assistant_content})
+        messages.append({"role": "assistant", "content": template.thinking_prefix + output})
 
-        samples.append({
-            "messages": messages,
-            "_meta": {
-                "source": "synthetic_generation",
-                "domain": "agahnim_build",
-                "confidence": 1.0,
-                "synthetic": True
-            }
-        })
+        yield {"messages": messages, "_meta": meta}
 
-    return samples[:count]
 
+# Majora output placeholders (templates are not .format()'d). Each output is
+# split once at import into literal runs (even indices) and placeholder names
+# (odd indices), so filling it in is a single join.
+MASK_PLACEHOLDER_RE = re.compile(r"(MASSKNAME|MASKNAME|MASKID)")
+MAJORA_OUTPUT_PARTS = tuple(
+    MASK_PLACEHOLDER_RE.split(t.output) for t in MAJORA_TEMPLATES_PARSED
+)
+
+
+def _replace_placeholders(parts: list[str], replacements: Dict[str, str]) -> str:
+    """Join pre-split output parts, substituting each placeholder name."""
+    if len(parts) == 1:
+        return parts[0]
+    parts = parts.copy()
+    parts[1::2] = [replacements[name] for name in parts[1::2]]
+    return "".join(parts)
 
-def generate_majora_samples(count: int = 250) -> List[Dict]:
-    """Generate synthetic Majora (Oracle) examples."""
-    samples = []
 
+def generate_majora_samples(count: int = 250) -> Iterator[Dict]:
+    """Generate synthetic Majora (Oracle) examples."""
     mask_names = ["Deku", "Goron", "Zora", "Giant", "Fierce Deity", "Bunny", "Stone", "Truth"]
     system_names = ["Time System", "Mask System", "Ocarina System", "Ranch System", "Minecart System"]
 
-    for template in MAJORA_TEMPLATES * (count // len(MAJORA_TEMPLATES) + 1):
-        if len(samples) >= count:
-            break
-
-        # Get random mask name
-        selected_mask = random.choice(mask_names)
+    # Identical across samples, so one system message and _meta are shared by all of them
+    system_message = SYSTEM_MESSAGES["majora_oracle"]
+    meta = SAMPLE_META["majora_oracle"]
 
-        instruction = template["instruction"]
-        output = template["output"]
+    # Random mask name and mask id for every sample, drawn in one call each
+    selected_masks = random.choices(mask_names, k=count)
+    mask_ids = random.choices([str(mask_id) for mask_id in range(3, 8)], k=count)
 
-        # Replace MASKNAME placeholders (no .format() needed)
-        output = output.replace("MASKNAME", selected_mask.lower())
-        output = output.replace("MASSKNAME", selected_mask)
-        output = output.replace("MASKID", str(random.randint(3, 7)))
+    templates = zip(MAJORA_TEMPLATES_PARSED, MAJORA_OUTPUT_PARTS)
+    for (template, output_parts), selected_mask, mask_id in zip(
+        islice(cycle(templates), count), selected_masks, mask_ids
+    ):
+        instruction = template.instruction
 
-        thinking = template.get("thinking", "")
+        # Fill in the MASKNAME/MASSKNAME/MASKID placeholders
+        replacements = {
+            "MASKNAME": selected_mask.lower(),
+            "MASSKNAME": selected_mask,
+            "MASKID": mask_id,
+        }
+        output = _replace_placeholders(output_parts, replacements)
 
         messages = [
-            {"role": "system", "content": SYSTEM_PROMPTS["majora_oracle"]},
+            system_message,
             {"role": "user", "content": instruction}
         ]
 
-        assistant_content = f"<thinking>\n{thinking}\n</thinking>\n\n{output}" if thinking else output
-        messages.append({"role": "assistant", "content": assistant_content})
-
-        samples.append({
-            "messages": messages,
-            "_meta": {
-                "source": "synthetic_generation",
-                "domain": "majora_oracle",
-                "confidence": 1.0,
-                "synthetic": True
-            }
-        })
-
-    return samples[:count]
+        messages.append({"role": "assistant", "content": template.thinking_prefix + output})
+
+        yield {"messages": messages, "_meta": meta}
+
+
+def write_samples(path: Path, samples: Iterable[Dict]) -> int:
+    """Write samples to a JSONL file as they are produced; return the count.
+
+    Encoding and writing run on a separate thread fed through a bounded
+    queue, so they overlap with generating the next samples.
+    """
+    pending = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+    errors = []
+
+    def writer(f) -> None:
+        try:
+            while (sample := pending.get()) is not None:
+                f.write(dumps_sample_line(sample))
+        except Exception as e:  # re-raised on the producer side
+            errors.append(e)
+            while pending.get() is not None:  # keep draining so put() can't block
+                pass
+
+    count = 0
+    with open(path, "wb", buffering=WRITE_BUFFER_SIZE) as f:
+        thread = threading.Thread(target=writer, args=(f,), daemon=True)
+        thread.start()
+        try:
+            for sample in samples:
+                pending.put(sample)
+                count += 1
+        finally:
+            pending.put(None)
+            thread.join()
+    if errors:
+        raise errors[0]
+    return count
+
+
+def generate_and_write(kind: str, count: int, path: Path) -> int:
+    """Generate one domain's samples and write them (process pool worker)."""
+    random.seed()  # don't share the parent's RNG state across workers
+    generator = {
+        "agahnim": generate_agahnim_samples,
+        "majora": generate_majora_samples,
+    }[kind]
+    return write_samples(path, generator(count))
 
 
 def main():
-    output_dir = Path.home() / "src/lab/afs/training_data/synthetic"
+    output_dir = OUTPUT_DIR
     output_dir.mkdir(parents=True, exist_ok=True)
 
     print("=== Generating Synthetic Training Examples ===\n")
 
-    # Generate Agahnim samples
-    print("Generating Agahnim (build) samples...")
-    agahnim_samples = generate_agahnim_samples(350)
+    # The two generators are independent, so run them in separate processes;
+    # each streams its own file and only the count comes back
     agahnim_file = output_dir / "agahnim_synthetic.jsonl"
-    with open(agahnim_file, "w") as f:
-        for sample in agahnim_samples:
-            f.write(json.dumps(sample) + "\n")
-    print(f"  ✓ {len(agahnim_samples)} samples -> {agahnim_file.name}")
-
-    # Generate Majora samples
-    print("Generating Majora (Oracle) samples...")
-    majora_samples = generate_majora_samples(250)
     majora_file = output_dir / "majora_synthetic.jsonl"
-    with open(majora_file, "w") as f:
-        for sample in majora_samples:
-            f.write(json.dumps(sample) + "\n")
-    print(f"  ✓ {len(majora_samples)} samples -> {majora_file.name}")
+    print("Generating Agahnim (build) and Majora (Oracle) samples...")
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        agahnim_future = executor.submit(generate_and_write, "agahnim", 350, agahnim_file)
+        majora_future = executor.submit(generate_and_write, "majora", 250, majora_file)
+        agahnim_count = agahnim_future.result()
+        majora_count = majora_future.result()
+    print(f"  ✓ {agahnim_count} samples -> {agahnim_file.name}")
+    print(f"  ✓ {majora_count} samples -> {majora_file.name}")
 
     # Summary
     print("\n=== Summary ===")
-    print(f"Total synthetic samples: {len(agahnim_samples) + len(majora_samples)}")
-    print(f"  Agahnim (build): {len(agahnim_samples)}")
-    print(f"  Majora (Oracle): {len(majora_samples)}")
+    print(f"Total synthetic samples: {agahnim_count + majora_count}")
+    print(f"  Agahnim (build): {agahnim_count}")
+    print(f"  Majora (Oracle): {majora_count}")
     print(f"\nOutput directory: {output_dir}")
 
     # Combined stats with filtered data
-    filtered_dir = Path.home() / "src/lab/afs/training_data/filtered"
     print("\n=== Combined Dataset Statistics ===")
 
     totals = {
@@ -636,13 +807,13 @@ def main():
         "nayru_codegen": 2397
     }
 
-    totals["agahnim_build"] += len(agahnim_samples)
-    totals["majora_oracle"] += len(majora_samples)
+    totals["agahnim_build"] += agahnim_count
+    totals["majora_oracle"] += majora_count
 
     print(f"{'Domain':<20} {'Filtered':<10} {'Synthetic':<10} {'Total':<10}")
     print("-" * 50)
-    print(f"{'Agahnim (build)':<20} {166:<10} {len(agahnim_samples):<10} {totals['agahnim_build']:<10}")
-    print(f"{'Majora (Oracle)':<20} {65:<10} {len(majora_samples):<10} {totals['majora_oracle']:<10}")
+    print(f"{'Agahnim (build)':<20} {166:<10} {agahnim_count:<10} {totals['agahnim_build']:<10}")
+    print(f"{'Majora (Oracle)':<20} {65:<10} {majora_count:<10} {totals['majora_oracle']:<10}")
     print(f"{'Farore (debug)':<20} {1562:<10} {0:<10} {1562:<10}")
     print(f"{'Veran (hardware)':<20} {2394:<10} {0:<10} {2394:<10}")
     print(f"{'Nayru (codegen)':<20} {2397:<10} {0:<10} {2397:<10}")
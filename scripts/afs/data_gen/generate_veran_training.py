@@ -8,13 +8,21 @@ Addresses critical knowledge gaps identified in evaluation:
 - HDMA operation
 """
 
-import json
+import sys
 from datetime import datetime
 from pathlib import Path
 
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import dumps_line
+
+
 OUTPUT_DIR = Path.home() / ".context" / "training_pools"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
+# One generation timestamp shared by every sample built in this run
+GENERATED_AT = datetime.now().isoformat()
+
 def create_sample(input_text: str, output_text: str, tags: list[str]) -> dict:
     """Create a training sample in standard format."""
     return {
@@ -22,7 +30,7 @@ def create_sample(input_text: str, output_text: str, tags: list[str]) -> dict:
         "output": output_text,
         "domain": "snes",
         "source": "manual_generation",
-        "timestamp": datetime.now().isoformat(),
+        "timestamp": GENERATED_AT,
         "metadata": {
             "expert": "veran",
             "tags": tags,
@@ -139,9 +147,8 @@ def main():
 
     output_path = OUTPUT_DIR / "veran_critical_training.jsonl"
 
-    with open(output_path, "w") as f:
-        for sample in all_samples:
-            f.write(json.dumps(sample) + "\n")
+    with open(output_path, "wb") as f:
+        f.writelines(dumps_line(sample) for sample in all_samples)
 
     print(f"Generated {len(all_samples)} training samples")
     print(f"Output: {output_path}")
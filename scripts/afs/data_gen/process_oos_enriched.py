@@ -5,8 +5,28 @@ Converts ALL OOS samples to Majora training format.
 """
 
 import json
+import sys
+import os
+import shutil
+import tempfile
+from multiprocessing import Pool
 from pathlib import Path
 
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import dumps_line, json_loads
+
+
+# Large read buffer for the input corpus (fewer read syscalls)
+READ_BUFFER_SIZE = 1 << 20
+# Smallest byte range worth handing to a worker process
+MIN_CHUNK_SIZE = 1 << 22
+
+# ASM-like content markers for is_high_quality. The single-character ones come
+# first: they're the most common hits and the cheapest scans. ("#$" is implied
+# by "$".)
+ASM_INDICATORS = ("$", ";", "LDA", "STA", "JSR", "JSL", "RTS", "RTL", "db ", "dw ", "namespace")
+
 # Majora system prompt
 MAJORA_SYSTEM_PROMPT = """You are Majora, an expert on the Oracle of Secrets ROM hack for A Link to the Past.
 
@@ -66,28 +86,42 @@ def is_high_quality(sample: dict) -> bool:
         return False
 
     # Should contain ASM-like content
-    asm_indicators = ["$", "LDA", "STA", "JSR", "JSL", "RTS", "RTL", "#$", "db ", "dw ", ";", "namespace"]
-    has_asm = any(ind in output for ind in asm_indicators)
+    has_asm = any(ind in output for ind in ASM_INDICATORS)
 
     return has_asm
 
 
-def main():
-    oos_file = Path.home() / "src/training/datasets/oos_enriched_v1_normalized_notodo_asar_pass.jsonl"
-    output_file = Path.home() / "src/lab/afs/training_data/filtered/majora_oracle_oos_enriched.jsonl"
+def chunk_ranges(path: Path) -> list[tuple[int, int]]:
+    """Split a file into up to one byte range per CPU (at least MIN_CHUNK_SIZE each)."""
+    size = os.stat(path).st_size
+    count = max(1, min(os.cpu_count() or 1, size // MIN_CHUNK_SIZE))
+    bounds = [size * i // count for i in range(count + 1)]
+    return list(zip(bounds, bounds[1:]))
 
-    print("Processing Oracle of Secrets enriched dataset...")
-    print(f"Input: {oos_file}")
-    print(f"Output: {output_file}")
-    print()
 
-    processed = []
+def process_chunk(args: tuple[Path, int, int, Path]) -> tuple[int, int]:
+    """Filter and convert the lines starting in [start, end) into a shard file.
+
+    Returns (processed, skipped) counts.
+    """
+    oos_file, start, end, shard_path = args
+    processed = 0
     skipped = 0
 
-    with open(oos_file) as f:
-        for line_num, line in enumerate(f, 1):
+    with open(oos_file, "rb", buffering=READ_BUFFER_SIZE) as f, open(shard_path, "wb") as out:
+        pos = start
+        if start:
+            # Resync to the first line that starts at or after `start`
+            f.seek(start - 1)
+            pos += len(f.readline()) - 1
+        while pos < end:
+            line = f.readline()
+            if not line:
+                break
+            pos += len(line)
+
             try:
-                sample = json.loads(line.strip())
+                sample = json_loads(line)
             except json.JSONDecodeError:
                 skipped += 1
                 continue
@@ -96,20 +130,67 @@ def main():
                 skipped += 1
                 continue
 
-            chatml = convert_to_chatml(sample)
-            processed.append(chatml)
+            out.write(dumps_line(convert_to_chatml(sample)))
+            processed += 1
+
+    return processed, skipped
 
-            if line_num % 1000 == 0:
-                print(f"  Processed {line_num} samples...")
 
-    # Write to output
-    with open(output_file, "w") as f:
-        for sample in processed:
-            f.write(json.dumps(sample) + "\n")
+def append_file(out, src) -> None:
+    """Append the whole of binary file `src` to `out`, copying in the kernel where possible."""
+    size = os.fstat(src.fileno()).st_size
+    offset = 0
+    if hasattr(os, "sendfile"):
+        out.flush()
+        try:
+            while offset < size:
+                sent = os.sendfile(out.fileno(), src.fileno(), offset, size - offset)
+                if not sent:
+                    break
+                offset += sent
+        except OSError:
+            pass  # e.g. macOS only sends to sockets; copy the rest below
+    if offset < size:
+        src.seek(offset)
+        shutil.copyfileobj(src, out, READ_BUFFER_SIZE)
+        out.flush()
+
+
+def main():
+    oos_file = Path.home() / "src/training/datasets/oos_enriched_v1_normalized_notodo_asar_pass.jsonl"
+    output_file = Path.home() / "src/lab/afs/training_data/filtered/majora_oracle_oos_enriched.jsonl"
+
+    print("Processing Oracle of Secrets enriched dataset...")
+    print(f"Input: {oos_file}")
+    print(f"Output: {output_file}")
+    print()
+
+    # Lines are independent, so split the input into newline-aligned byte
+    # ranges, filter/convert each in its own process into a shard, then
+    # concatenate the shards in order. Only counts come back.
+    processed = 0
+    skipped = 0
+
+    ranges = chunk_ranges(oos_file)
+    with tempfile.TemporaryDirectory(dir=output_file.parent) as shard_dir:
+        jobs = [
+            (oos_file, start, end, Path(shard_dir) / f"shard_{i}.jsonl")
+            for i, (start, end) in enumerate(ranges)
+        ]
+        with Pool(len(jobs)) as pool:
+            for chunk_processed, chunk_skipped in pool.imap_unordered(process_chunk, jobs):
+                processed += chunk_processed
+                skipped += chunk_skipped
+                print(f"  Processed {processed + skipped} samples...")
+
+        with open(output_file, "wb") as out:
+            for _, _, _, shard_path in jobs:
+                with open(shard_path, "rb") as shard:
+                    append_file(out, shard)
 
     print()
     print("=== Summary ===")
-    print(f"Total samples processed: {len(processed)}")
+    print(f"Total samples processed: {processed}")
     print(f"Skipped (low quality): {skipped}")
     print(f"Output: {output_file}")
     print()
@@ -3,6 +3,9 @@ import json
 import subprocess
 import random
 import argparse
+import functools
+import os
+import pickle
 import re
 from pathlib import Path
 
@@ -11,34 +14,80 @@ OOS_REPO = Path.home() / "src/hobby/oracle-of-secrets"
 GUIDELINES_DIR = OOS_REPO / ".context/knowledge"
 OUTPUT_DIR = Path.home() / "src/lab/afs/training_data/synthetic/oos"
 OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+GUIDELINES_CACHE = Path.home() / ".cache/afs/guidelines.pkl"
+
+# Added (non-header) lines of a diff, matched on the raw bytes
+ADDED_LINE_RE = re.compile(rb'^\+([ \t]*[^+\- ].*)$', re.MULTILINE)
+MAX_ASM_LINES = 10
+
+# Load Guidelines (cached in-process and on disk, keyed on file names, sizes + mtimes)
+def guidelines_signature():
+    try:
+        with os.scandir(GUIDELINES_DIR) as it:
+            entries = sorted((e for e in it if e.name.endswith(".md") and e.is_file()), key=lambda e: e.name)
+    except FileNotFoundError:
+        entries = []
+    signature = [str(GUIDELINES_DIR)]
+    for e in entries:
+        st = e.stat()
+        signature.append((e.name, st.st_size, st.st_mtime_ns))
+    return tuple(signature)
+
+@functools.lru_cache(maxsize=1)
+def _load_guidelines(signature):
+    try:
+        with open(GUIDELINES_CACHE, "rb") as f:
+            cached_signature, guidelines = pickle.load(f)
+        if cached_signature == signature:
+            return guidelines
+    except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+        pass
 
-# Load Guidelines
-def load_guidelines():
     guidelines = {}
-    for file in GUIDELINES_DIR.glob("*.md"):
-        with open(file, 'r') as f:
-            guidelines[file.stem] = f.read()
+    for name, size, _ in signature[1:]:
+        # One raw read of the known size per file
+        fd = os.open(os.path.join(signature[0], name), os.O_RDONLY)
+        try:
+            data = os.read(fd, size)
+        finally:
+            os.close(fd)
+        guidelines[os.path.splitext(name)[0]] = data.decode("utf-8")
+
+    try:
+        GUIDELINES_CACHE.parent.mkdir(parents=True, exist_ok=True)
+        with open(GUIDELINES_CACHE, "wb") as f:
+            pickle.dump((signature, guidelines), f)
+    except OSError:
+        pass  # the cache is only an optimization
     return guidelines
 
+def load_guidelines():
+    return _load_guidelines(guidelines_signature())
+
 # Git Context Functions
 def get_recent_commits(limit=100):
-    cmd = ["git", "log", f"-n {limit}", "--format=%H|%s|%ai"]
-    result = subprocess.run(cmd, cwd=OOS_REPO, capture_output=True, text=True)
-    commits = []
-    for line in result.stdout.strip().split("\n"):
-        if "|" in line:
-            parts = line.split("|")
-            if len(parts) >= 3:
-                commits.append({"hash": parts[0], "subject": parts[1], "date": parts[2]})
-    return commits
-
-def get_commit_diff(commit_hash):
-    cmd = ["git", "show", commit_hash, "--format=", "-p"]
-    result = subprocess.run(cmd, cwd=OOS_REPO, capture_output=True, text=True)
-    return result.stdout
+    """Yield (commit, diff bytes) pairs for the last `limit` commits from one `git log -p` stream."""
+    cmd = ["git", "log", f"-n {limit}", "-p", "--cc", "--format=%x00%H%x1f%s%x1f%ai"]
+    with subprocess.Popen(
+        cmd, cwd=OOS_REPO, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=1 << 20,
+    ) as proc:
+        commit = None
+        diff = []
+        for line in proc.stdout:
+            # Each commit starts with a NUL-prefixed header line
+            if line.startswith(b"\x00"):
+                if commit is not None:
+                    yield commit, b"".join(diff)
+                parts = line[1:].rstrip(b"\n").decode("utf-8", "replace").split("\x1f")
+                commit = {"hash": parts[0], "subject": parts[1], "date": parts[2]}
+                diff = []
+            elif commit is not None:
+                diff.append(line)
+        if commit is not None:
+            yield commit, b"".join(diff)
 
 # Pattern Generator for high-quality synthetic ASM
-def synthesize_sample(commit, guidelines):
+def synthesize_sample(commit, diff, guidelines):
     subject = commit['subject'].lower()
     
     # Identify Expert
@@ -59,9 +108,13 @@ def synthesize_sample(commit, guidelines):
         instruction = f"Apply a technical patch to the Oracle {system} as described in: {commit['subject']}"
 
     # Extract relevant ASM patterns from diff if possible
-    diff = get_commit_diff(commit['hash'])
-    asm_blocks = re.findall(r'^\+([ \t]*[^+\- ].*)$', diff, re.MULTILINE)
-    context_asm = "\n".join(asm_blocks[:10]) if asm_blocks else "; No new ASM lines found in diff."
+    # (only the first few are used, so stop scanning once we have them)
+    asm_blocks = []
+    for match in ADDED_LINE_RE.finditer(diff):
+        asm_blocks.append(match.group(1).decode("utf-8", "replace").rstrip("\r"))
+        if len(asm_blocks) == MAX_ASM_LINES:
+            break
+    context_asm = "\n".join(asm_blocks) if asm_blocks else "; No new ASM lines found in diff."
 
     return {
         "instruction": instruction,
@@ -82,21 +135,18 @@ def main():
     args = parser.parse_args()
 
     # In a real scenario, this script would handle 1000s of commits
-    commits = get_recent_commits(args.limit)
     guidelines = load_guidelines()
     
-    samples = []
-    print(f"Synthesizing {len(commits)} high-fidelity samples...")
-    for commit in commits:
-        sample = synthesize_sample(commit, guidelines)
-        samples.append(sample)
-
     output_file = OUTPUT_DIR / "oos_synthetic_scaled_v2.jsonl"
+    count = 0
+    print(f"Synthesizing high-fidelity samples from up to {args.limit} commits...")
     with open(output_file, "w") as f:
-        for s in samples:
-            f.write(json.dumps(s) + "\n")
+        # Write each sample as its commit streams in from git
+        for commit, diff in get_recent_commits(args.limit):
+            f.write(json.dumps(synthesize_sample(commit, diff, guidelines)) + "\n")
+            count += 1
     
-    print(f"Success! Generated {len(samples)} samples to {output_file}")
+    print(f"Success! Generated {count} samples to {output_file}")
 
 if __name__ == "__main__":
     main()
@@ -58,6 +58,10 @@ EVAL_CASES = [
     },
 ]
 
+# Difficulty of each case as an index into DIFFICULTIES (parallel to EVAL_CASES)
+DIFFICULTIES = ("basic", "intermediate", "advanced", "snes_hardware")
+CASE_DIFFICULTY = tuple(DIFFICULTIES.index(c["difficulty"]) for c in EVAL_CASES)
+
 def evaluate_response(response: str, expected_concepts: list) -> dict:
     """Check how many expected concepts appear in response."""
     response_lower = response.lower()
@@ -79,6 +83,10 @@ def evaluate_response(response: str, expected_concepts: list) -> dict:
 def run_eval():
     """Run evaluation on Veran model."""
     from mlx_lm import load, generate
+    try:
+        from mlx_lm import batch_generate
+    except ImportError:  # older mlx_lm: generate one prompt at a time
+        batch_generate = None
     
     model_path = Path(__file__).parent.parent.parent / "models" / "veran-lora-fused"
     print(f"Loading model from {model_path}...")
@@ -94,20 +102,39 @@ For each code block:
 
 Be concise. Focus on understanding, not exhaustive detail."""
 
-    results = {"basic": [], "intermediate": [], "advanced": [], "snes_hardware": []}
+    results = {difficulty: [] for difficulty in DIFFICULTIES}
+    scores = [0.0] * len(EVAL_CASES)
     
-    for i, case in enumerate(EVAL_CASES):
-        print(f"\n{'='*60}")
-        print(f"Test {i+1}/{len(EVAL_CASES)} [{case['difficulty']}]")
-        print(f"Code:\n{case['code']}")
-        
-        messages = [
+    # Build every prompt up front and generate all responses in one batch
+    all_messages = [
+        [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": f"Explain this 65816 code:\n{case['code']}"}
         ]
-        
-        prompt = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        response = generate(model, tokenizer, prompt=prompt, max_tokens=300, verbose=False)
+        for case in EVAL_CASES
+    ]
+
+    print(f"\nGenerating {len(EVAL_CASES)} responses...")
+    if batch_generate is not None:
+        prompts = [
+            tokenizer.apply_chat_template(messages, add_generation_prompt=True)
+            for messages in all_messages
+        ]
+        responses = batch_generate(model, tokenizer, prompts, max_tokens=300, verbose=False).texts
+    else:
+        responses = [
+            generate(
+                model, tokenizer,
+                prompt=tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True),
+                max_tokens=300, verbose=False,
+            )
+            for messages in all_messages
+        ]
+
+    for i, (case, response) in enumerate(zip(EVAL_CASES, responses)):
+        print(f"\n{'='*60}")
+        print(f"Test {i+1}/{len(EVAL_CASES)} [{case['difficulty']}]")
+        print(f"Code:\n{case['code']}")
         
         print(f"\nResponse:\n{response}")
         
@@ -115,6 +142,7 @@ Be concise. Focus on understanding, not exhaustive detail."""
         print(f"\nScore: {eval_result['score']:.0%}")
         print(f"Found: {eval_result['found']}")
         print(f"Missing: {eval_result['missing']}")
+        scores[i] = eval_result["score"]
         
         results[case["difficulty"]].append({
             "code": case["code"],
@@ -129,17 +157,17 @@ Be concise. Focus on understanding, not exhaustive detail."""
     print("EVALUATION SUMMARY")
     print(f"{'='*60}")
     
-    total_score = 0
-    total_tests = 0
-    
-    for difficulty, cases in results.items():
-        if cases:
-            avg_score = sum(c["score"] for c in cases) / len(cases)
-            total_score += sum(c["score"] for c in cases)
-            total_tests += len(cases)
-            print(f"{difficulty}: {avg_score:.0%} ({len(cases)} tests)")
+    # Per-difficulty totals and case counts in one pass over the parallel lists
+    counts = [0] * len(DIFFICULTIES)
+    totals = [0.0] * len(DIFFICULTIES)
+    for d, score in zip(CASE_DIFFICULTY, scores):
+        counts[d] += 1
+        totals[d] += score
+    for difficulty, count, total in zip(DIFFICULTIES, counts, totals):
+        if count:
+            print(f"{difficulty}: {total / count:.0%} ({count} tests)")
     
-    overall = total_score / total_tests if total_tests else 0
+    overall = sum(scores) / len(scores) if scores else 0
     print(f"\nOVERALL: {overall:.0%}")
     
     # Save results
@@ -1,6 +1,8 @@
 #!/usr/bin/env python3
 """Evaluate Veran cloud-trained model on SNES hardware tasks."""
 
+import argparse
+import asyncio
 import json
 import sys
 from pathlib import Path
@@ -9,14 +11,16 @@ try:
     import torch
     from transformers import AutoModelForCausalLM, AutoTokenizer, BitsAndBytesConfig
     from peft import PeftModel
-except ImportError:
-    print("Install: pip install transformers peft bitsandbytes accelerate")
-    sys.exit(1)
+except ImportError:  # only needed when running the model locally
+    torch = None
 
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 # Use v2 adapters (register-emphasis training)
 ADAPTER_PATH = PROJECT_ROOT / "models" / "veran-cloud-adapters-v2"
 MODEL_NAME = "Qwen/Qwen2.5-Coder-7B-Instruct"
+# Optional AWQ int4 checkpoint of the merged model (e.g. quantized once with autoawq);
+# preferred over NF4 + adapters on CUDA when present
+AWQ_PATH = PROJECT_ROOT / "models" / "veran-cloud-awq"
 
 SYSTEM_PROMPT = """You are Veran, a 65816 assembly code explanation expert specializing in SNES/Super Famicom hardware."""
 
@@ -39,13 +43,48 @@ EVAL_CASES = [
     {"code": "LDA #$80\nSTA $2115", "expected": ["VRAM", "increment", "address", "VMAIN"], "difficulty": "snes_hardware"},
 ]
 
+# Difficulty of each case as an index into DIFFICULTIES (parallel to EVAL_CASES)
+DIFFICULTIES = ("basic", "intermediate", "snes_hardware")
+CASE_DIFFICULTY = tuple(DIFFICULTIES.index(c["difficulty"]) for c in EVAL_CASES)
+
+
+def build_messages(case):
+    """Chat messages for one evaluation case."""
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": f"Explain this 65816 code:\n{case['code']}"}
+    ]
+
 
 def load_model():
     """Load model with adapters."""
+    if torch is None:
+        print("Install: pip install transformers peft bitsandbytes accelerate")
+        sys.exit(1)
+    # The AWQ checkpoint is only used on CUDA; everywhere else needs the adapters
+    use_awq = torch.cuda.is_available() and AWQ_PATH.exists()
+    if not use_awq and not ADAPTER_PATH.exists():
+        print(f"Error: Adapters not found at {ADAPTER_PATH}")
+        sys.exit(1)
     print("Loading model...")
     tokenizer = AutoTokenizer.from_pretrained(MODEL_NAME, trust_remote_code=True)
     
+    if use_awq:
+        # Adapters are already merged in and the checkpoint's config carries
+        # the AWQ quantization settings
+        print(f"Using AWQ checkpoint at {AWQ_PATH}")
+        torch.backends.cuda.matmul.allow_tf32 = True
+        model = AutoModelForCausalLM.from_pretrained(
+            str(AWQ_PATH),
+            device_map="auto",
+            trust_remote_code=True,
+        )
+        model.eval()
+        return model, tokenizer
+    
     if torch.cuda.is_available():
+        # Let the remaining fp32 matmuls run on TF32 tensor cores
+        torch.backends.cuda.matmul.allow_tf32 = True
         bnb_config = BitsAndBytesConfig(
             load_in_4bit=True,
             bnb_4bit_quant_type="nf4",
@@ -70,67 +109,159 @@ def load_model():
     return model, tokenizer
 
 
-def evaluate(model, tokenizer):
-    """Run evaluation."""
-    results = {"basic": [], "intermediate": [], "snes_hardware": []}
+def shared_prefix_length(sequences):
+    """Length of the longest common prefix of token id sequences."""
+    length = 0
+    for tokens in zip(*sequences):
+        if any(token != tokens[0] for token in tokens):
+            break
+        length += 1
+    return length
+
+
+def generate_responses(model, tokenizer):
+    """Generate every case's response locally with one batched generate() call."""
+    prompt_ids = [
+        tokenizer.apply_chat_template(build_messages(case), add_generation_prompt=True, return_dict=False)
+        for case in EVAL_CASES
+    ]
     
-    for i, case in enumerate(EVAL_CASES, 1):
+    # Every prompt starts with the same system turn (and user preamble), so
+    # prefill that prefix once and reuse its KV cache for the whole batch.
+    # At least one token per prompt is left for generate() to prefill.
+    prefix_length = min(shared_prefix_length(prompt_ids), min(map(len, prompt_ids)) - 1)
+    prefix = torch.tensor([prompt_ids[0][:prefix_length]])
+    with torch.no_grad():
+        prefix_cache = model(input_ids=prefix.to(model.device), use_cache=True).past_key_values
+    prefix_cache.batch_repeat_interleave(len(prompt_ids))
+    
+    # Left-pad the distinct suffixes as one batch; padding sits between the
+    # cached prefix and each suffix and is masked out
+    tokenizer.padding_side = "left"
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    suffixes = tokenizer.pad(
+        {"input_ids": [ids[prefix_length:] for ids in prompt_ids]}, return_tensors="pt"
+    )
+    batch_size = len(prompt_ids)
+    input_ids = torch.cat([prefix.expand(batch_size, -1), suffixes["input_ids"]], dim=1)
+    attention_mask = torch.cat(
+        [torch.ones(batch_size, prefix_length, dtype=suffixes["attention_mask"].dtype), suffixes["attention_mask"]],
+        dim=1,
+    )
+    inputs = {"input_ids": input_ids, "attention_mask": attention_mask}
+    if torch.cuda.is_available():
+        # Copy from pinned host memory so the transfers don't stall the host
+        inputs = {k: v.pin_memory().to("cuda", non_blocking=True) for k, v in inputs.items()}
+    
+    print(f"\nGenerating {len(EVAL_CASES)} responses...")
+    with torch.no_grad():
+        outputs = model.generate(
+            **inputs, past_key_values=prefix_cache,
+            max_new_tokens=200, do_sample=False, pad_token_id=tokenizer.pad_token_id,
+        )
+    
+    # Every row has the same (padded) prompt length, so each completion
+    # starts right after it
+    prompt_length = inputs["input_ids"].shape[1]
+    return tokenizer.batch_decode(outputs[:, prompt_length:], skip_special_tokens=True)
+
+
+async def _generate_responses_server(server_url, model_name):
+    import aiohttp
+
+    url = server_url.rstrip("/") + "/v1/chat/completions"
+
+    async def complete(session, case):
+        payload = {
+            "model": model_name,
+            "messages": build_messages(case),
+            "max_tokens": 200,
+            "temperature": 0,
+        }
+        async with session.post(url, json=payload) as response:
+            response.raise_for_status()
+            data = await response.json()
+        return data["choices"][0]["message"]["content"] or ""
+
+    async with aiohttp.ClientSession() as session:
+        return await asyncio.gather(*(complete(session, case) for case in EVAL_CASES))
+
+
+def generate_responses_server(server_url, model_name):
+    """Generate every case's response concurrently from an OpenAI-compatible server.
+
+    Meant for the merged checkpoint served by e.g. vLLM or llama.cpp's
+    llama-server, which batch the concurrent requests themselves.
+    """
+    print(f"\nRequesting {len(EVAL_CASES)} responses from {server_url}...")
+    return asyncio.run(_generate_responses_server(server_url, model_name))
+
+
+def evaluate(responses):
+    """Score responses (one per EVAL_CASES entry) and print the summary."""
+    results = {difficulty: [] for difficulty in DIFFICULTIES}
+    scores = [0.0] * len(EVAL_CASES)
+    
+    for i, (case, response) in enumerate(zip(EVAL_CASES, responses), 1):
         print(f"\n{'='*60}")
         print(f"Test {i}/{len(EVAL_CASES)} [{case['difficulty']}]")
         print(f"Code:\n{case['code']}")
         
-        messages = [
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"Explain this 65816 code:\n{case['code']}"}
-        ]
-        
-        text = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-        inputs = tokenizer(text, return_tensors="pt")
-        if torch.cuda.is_available():
-            inputs = {k: v.cuda() for k, v in inputs.items()}
-        
-        with torch.no_grad():
-            outputs = model.generate(**inputs, max_new_tokens=200, do_sample=False, pad_token_id=tokenizer.pad_token_id)
-        
-        response = tokenizer.decode(outputs[0][inputs["input_ids"].shape[1]:], skip_special_tokens=True)
         print(f"\nResponse:\n{response[:400]}")
         
-        # Score
+        # Score (each keyword is checked once, landing in found or missing)
         response_lower = response.lower()
-        found = [kw for kw in case["expected"] if kw.lower() in response_lower]
+        found = []
+        missing = []
+        for kw in case["expected"]:
+            (found if kw.lower() in response_lower else missing).append(kw)
         score = len(found) / len(case["expected"]) * 100
         
         print(f"\nScore: {score:.0f}%")
         print(f"Found: {found}")
-        print(f"Missing: {[k for k in case['expected'] if k.lower() not in response_lower]}")
+        print(f"Missing: {missing}")
         
         results[case["difficulty"]].append(score)
+        scores[i - 1] = score
     
     # Summary
     print(f"\n{'='*60}")
     print("EVALUATION SUMMARY")
     print("="*60)
     
-    total_scores = []
-    for difficulty, scores in results.items():
-        if scores:
-            avg = sum(scores) / len(scores)
-            total_scores.extend(scores)
-            print(f"{difficulty}: {avg:.0f}% ({len(scores)} tests)")
+    # Per-difficulty totals and case counts in one pass over the parallel lists
+    counts = [0] * len(DIFFICULTIES)
+    totals = [0.0] * len(DIFFICULTIES)
+    for d, score in zip(CASE_DIFFICULTY, scores):
+        counts[d] += 1
+        totals[d] += score
+    for difficulty, count, total in zip(DIFFICULTIES, counts, totals):
+        if count:
+            print(f"{difficulty}: {total / count:.0f}% ({count} tests)")
     
-    overall = sum(total_scores) / len(total_scores) if total_scores else 0
+    overall = sum(scores) / len(scores) if scores else 0
     print(f"\nOVERALL: {overall:.0f}%")
     
     return results
 
 
 def main():
-    if not ADAPTER_PATH.exists():
-        print(f"Error: Adapters not found at {ADAPTER_PATH}")
-        sys.exit(1)
-    
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--server",
+        help="Base URL of an OpenAI-compatible server (vLLM, llama.cpp) serving the merged model; "
+             "skips loading the model locally",
+    )
+    parser.add_argument("--model", default=MODEL_NAME, help="Model name to request from --server")
+    args = parser.parse_args()
+
+    if args.server:
+        evaluate(generate_responses_server(args.server, args.model))
+        return
+
     model, tokenizer = load_model()
-    evaluate(model, tokenizer)
+    evaluate(generate_responses(model, tokenizer))
 
 
 if __name__ == "__main__":
@@ -8,13 +8,22 @@ Creates ~500 benchmark items across all 4 domains:
 - Veran: Code explanation tasks from VERAN_EXAMPLES
 """
 
+import argparse
+import hashlib
 import json
+import os
 import sys
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
 from pathlib import Path
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+# and scripts/afs, for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.jsonio import dumps_line
+from afs.generators import template_libraries
 from afs.generators.template_libraries import (
     DIN_PATTERNS,
     FARORE_BUGS,
@@ -25,748 +34,523 @@ from afs.generators.template_libraries import (
     ASAR_SYNTAX,
 )
 
+DIFFICULTY_MAP = {"basic": 1, "intermediate": 2, "advanced": 3, "expert": 4}
+
+# Hash of the generator inputs, written next to the benchmarks they produced
+CACHE_KEY_FILE = ".cachekey"
+
+
+@dataclass(slots=True, kw_only=True)
+class BenchmarkItem:
+    """One benchmark record; serialized with to_dict() when saved."""
+
+    id: str
+    category: str
+    difficulty: int
+    code: str
+    expected_output: str | None = None
+    metadata: dict = field(default_factory=dict)
+    expected_metrics: dict | None = None
+
+    def to_dict(self) -> dict:
+        """JSON-ready dict in field order, leaving out unset optional fields."""
+        item = {"id": self.id, "category": self.category, "difficulty": self.difficulty, "code": self.code}
+        if self.expected_output is not None:
+            item["expected_output"] = self.expected_output
+        item["metadata"] = self.metadata
+        if self.expected_metrics is not None:
+            item["expected_metrics"] = self.expected_metrics
+        return item
+
+
+# Address variations for generating more test cases
+ZP_ADDRS = ("$10", "$12", "$14", "$20", "$22", "$30", "$40", "$50")
+VALUES = ("#$00", "#$01", "#$10", "#$42", "#$FF")
+# The two zero-page bytes following each address, e.g. "$10" -> ("$11", "$12")
+ZP_FOLLOWING = {
+    addr: (f"${int(addr[1:], 16)+1:02X}", f"${int(addr[1:], 16)+2:02X}") for addr in ZP_ADDRS
+}
+
+# Synthetic Din patterns: (before, after, description)
+MODE_PATTERNS = (
+    ("SEP #$20\nSEP #$10", "SEP #$30", "Combine 8-bit mode switches"),
+    ("REP #$20\nREP #$10", "REP #$30", "Combine 16-bit mode switches"),
+    ("SEP #$20\nNOP\nSEP #$20", "SEP #$20\nNOP", "Remove redundant SEP"),
+    ("REP #$20\nLDA $10\nREP #$20", "REP #$20\nLDA $10", "Remove redundant REP"),
+)
+LOOP_SIZES = (8, 16, 32, 64)
+MULTIPLY_PATTERNS = (
+    ("ASL A\nASL A\nASL A", "ASL A\nASL A\nASL A", "Multiply by 8 via shifts"),
+    ("LDA $10\nASL A\nCLC\nADC $10", "LDA $10\nSTA $00\nASL A\nADC $00", "Multiply by 3"),
+    ("LDA $10\nASL A\nASL A\nCLC\nADC $10", "LDA $10\nSTA $00\nASL A\nASL A\nADC $00", "Multiply by 5"),
+    ("LDA $10\nASL A\nASL A\nASL A\nSEC\nSBC $10", "LDA $10\nSTA $00\nASL A\nASL A\nASL A\nSBC $00", "Multiply by 7"),
+)
+BRANCH_PATTERNS = (
+    ("CMP #$00\nBEQ label", "BEQ label", "CMP #$00 redundant before BEQ"),
+    ("CMP #$00\nBNE label", "BNE label", "CMP #$00 redundant before BNE"),
+    ("LDA $10\nCMP #$00\nBEQ label", "LDA $10\nBEQ label", "LDA sets Z flag"),
+    ("LDA $10\nCMP #$00\nBNE label", "LDA $10\nBNE label", "LDA sets Z flag"),
+    ("AND #$FF\nBNE label", "BNE label", "AND #$FF is identity"),
+    ("ORA #$00\nBNE label", "BNE label", "ORA #$00 is identity"),
+    ("EOR #$00\nBNE label", "BNE label", "EOR #$00 is identity"),
+    ("ASL A\nLSR A\nBNE label", "AND #$FE\nBNE label", "Shift pair clears bit 0"),
+)
+ADDRESSING_PATTERNS = (
+    ("LDA $7E0000", "LDA $0000", "Use absolute instead of long for bank $7E"),
+    ("STA $7E0010", "STA $10", "Use zero page for low addresses"),
+    ("LDA #$00\nLDA $10,X", "LDA $10,X", "Redundant LDA before indexed"),
+    ("TXA\nTAY\nLDA table,Y", "LDA table,X", "Use X directly for index"),
+    ("PHA\nTXA\nTAY\nPLA\nLDA table,Y", "LDA table,X", "Complex index transfer"),
+)
+WORD_PATTERNS = (
+    ("LDA $10\nSTA $20\nLDA $11\nSTA $21", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Use 16-bit copy"),
+    ("STZ $10\nSTZ $11", "REP #$20\nSTZ $10\nSEP #$20", "Use 16-bit STZ"),
+    ("LDA $10\nCLC\nADC $12\nSTA $14\nLDA $11\nADC $13\nSTA $15", "REP #$20\nCLC\nLDA $10\nADC $12\nSTA $14\nSEP #$20", "Use 16-bit add"),
+    ("INC $10\nBNE +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Use 16-bit increment"),
+    ("LDA $10\nORA $11\nBNE label", "REP #$20\nLDA $10\nSEP #$20\nBNE label", "16-bit zero check"),
+)
+STACK_PATTERNS = (
+    ("PHA\nPLA", "", "Push/pull with no use"),
+    ("PHA\nTAX\nPLA", "TAX", "Save A around transfer"),
+    ("PHA\nPHX\nPLX\nPLA", "PHA\nPLA", "Unnecessary X push"),
+    ("PHP\nCLC\nPLP", "CLC", "Unnecessary processor save"),
+    ("PHA\nLDA $10\nSTA $20\nPLA", "LDA $10\nSTA $20", "A not needed after"),
+)
+DEAD_CODE_PATTERNS = (
+    ("LDA $10\nLDA $11", "LDA $11", "First LDA overwritten"),
+    ("STA $10\nSTA $10", "STA $10", "Duplicate store"),
+    ("STZ $10\nLDA #$00\nSTA $10", "STZ $10", "Store zero twice"),
+    ("INC $10\nDEC $10", "", "Increment then decrement"),
+    ("SEC\nCLC\nADC $10", "CLC\nADC $10", "SEC overwritten by CLC"),
+    ("REP #$20\nSEP #$20\nLDA $10", "LDA $10", "Mode switch cancelled"),
+    ("NOP\nNOP\nNOP", "", "Remove NOPs"),
+)
+STRENGTH_PATTERNS = (
+    ("LDA $10\nCLC\nADC #$01\nSTA $10", "INC $10", "ADC #$01 to INC"),
+    ("LDA $10\nSEC\nSBC #$01\nSTA $10", "DEC $10", "SBC #$01 to DEC"),
+    ("LDA $10\nASL A\nSTA $10", "ASL $10", "In-memory shift"),
+    ("LDA $10\nLSR A\nSTA $10", "LSR $10", "In-memory shift right"),
+    ("LDA $10\nROL A\nSTA $10", "ROL $10", "In-memory rotate"),
+    ("LDX $10\nINX\nSTX $10", "INC $10", "Via X to INC"),
+    ("LDY $10\nDEY\nSTY $10", "DEC $10", "Via Y to DEC"),
+)
 
-def generate_din_benchmarks() -> list[dict]:
-    """Generate Din optimization benchmark items."""
-    items = []
-    item_id = 0
 
-    difficulty_map = {"basic": 1, "intermediate": 2, "advanced": 3, "expert": 4}
+# Din sections emitted by one loop, in order: (id prefix, category, difficulty, patterns)
+DIN_SECTIONS = (
+    ("din_mult_", "multiplication", 2, MULTIPLY_PATTERNS),
+    ("din_branch_", "branch_optimization", 1, BRANCH_PATTERNS),
+    ("din_addr_", "addressing_mode", 2, ADDRESSING_PATTERNS),
+    ("din_word_", "16bit_optimization", 2, WORD_PATTERNS),
+    ("din_stack_", "stack_optimization", 1, STACK_PATTERNS),
+    ("din_dead_", "dead_code", 1, DEAD_CODE_PATTERNS),
+    ("din_strength_", "strength_reduction", 1, STRENGTH_PATTERNS),
+)
+
 
-    # Address variations for generating more test cases
-    zp_addrs = ["$10", "$12", "$14", "$20", "$22", "$30", "$40", "$50"]
-    abs_addrs = ["$1000", "$1100", "$2000", "$7E0100", "$7E0200"]
-    values = ["#$00", "#$01", "#$10", "#$42", "#$FF"]
-    regs = [("LDA", "STA"), ("LDX", "STX"), ("LDY", "STY")]
+def generate_din_benchmarks() -> Iterator[BenchmarkItem]:
+    """Yield Din optimization benchmark items."""
+    item_id = 0
 
     for difficulty, categories in DIN_PATTERNS.items():
-        diff_level = difficulty_map.get(difficulty, 1)
+        diff_level = DIFFICULTY_MAP.get(difficulty, 1)
+        id_prefix = f"din_{difficulty}_"
 
         for category, patterns in categories.items():
             for before, after, description in patterns:
                 item_id += 1
-                items.append({
-                    "id": f"din_{difficulty}_{item_id:03d}",
-                    "category": category,
-                    "difficulty": diff_level,
-                    "code": before,
-                    "expected_output": after,
-                    "metadata": {
+                yield BenchmarkItem(
+                    id=f"{id_prefix}{item_id:03d}",
+                    category=category,
+                    difficulty=diff_level,
+                    code=before,
+                    expected_output=after,
+                    metadata={
                         "description": description,
                         "task": "optimize",
                     },
-                    "expected_metrics": {}
-                })
+                    expected_metrics={}
+                )
 
                 # Generate variations for basic patterns
                 if difficulty == "basic" and "$10" in before:
-                    for addr in zp_addrs[1:4]:  # Add 3 variations
+                    for addr in ZP_ADDRS[1:4]:  # Add 3 variations
                         item_id += 1
-                        var_before = before.replace("$10", addr).replace("$11", f"${int(addr[1:], 16)+1:02X}").replace("$12", f"${int(addr[1:], 16)+2:02X}")
-                        var_after = after.replace("$10", addr).replace("$11", f"${int(addr[1:], 16)+1:02X}").replace("$12", f"${int(addr[1:], 16)+2:02X}")
-                        items.append({
-                            "id": f"din_{difficulty}_{item_id:03d}",
-                            "category": category,
-                            "difficulty": diff_level,
-                            "code": var_before,
-                            "expected_output": var_after,
-                            "metadata": {
+                        addr1, addr2 = ZP_FOLLOWING[addr]
+                        var_before = before.replace("$10", addr).replace("$11", addr1).replace("$12", addr2)
+                        var_after = after.replace("$10", addr).replace("$11", addr1).replace("$12", addr2)
+                        yield BenchmarkItem(
+                            id=f"{id_prefix}{item_id:03d}",
+                            category=category,
+                            difficulty=diff_level,
+                            code=var_before,
+                            expected_output=var_after,
+                            metadata={
                                 "description": description + f" (addr variation: {addr})",
                                 "task": "optimize",
                             },
-                        })
+                        )
 
     # Add synthetic redundant load patterns
-    for i, addr in enumerate(zp_addrs):
-        for val in values[:3]:
+    for addr in ZP_ADDRS:
+        next_addr = ZP_FOLLOWING[addr][0]
+        for val in VALUES[:3]:
             item_id += 1
-            next_addr = f"${int(addr[1:], 16)+1:02X}"
-            items.append({
-                "id": f"din_synth_{item_id:03d}",
-                "category": "redundant_loads",
-                "difficulty": 1,
-                "code": f"LDA {val}\nSTA {addr}\nLDA {val}\nSTA {next_addr}",
-                "expected_output": f"LDA {val}\nSTA {addr}\nSTA {next_addr}" if val != "#$00" else f"STZ {addr}\nSTZ {next_addr}",
-                "metadata": {"description": "Synthetic redundant load pattern", "task": "optimize"},
-            })
+            yield BenchmarkItem(
+                id=f"din_synth_{item_id:03d}",
+                category="redundant_loads",
+                difficulty=1,
+                code=f"LDA {val}\nSTA {addr}\nLDA {val}\nSTA {next_addr}",
+                expected_output=f"LDA {val}\nSTA {addr}\nSTA {next_addr}" if val != "#$00" else f"STZ {addr}\nSTZ {next_addr}",
+                metadata={"description": "Synthetic redundant load pattern", "task": "optimize"},
+            )
 
     # Add synthetic mode switch patterns
-    mode_patterns = [
-        ("SEP #$20\nSEP #$10", "SEP #$30", "Combine 8-bit mode switches"),
-        ("REP #$20\nREP #$10", "REP #$30", "Combine 16-bit mode switches"),
-        ("SEP #$20\nNOP\nSEP #$20", "SEP #$20\nNOP", "Remove redundant SEP"),
-        ("REP #$20\nLDA $10\nREP #$20", "REP #$20\nLDA $10", "Remove redundant REP"),
-    ]
-    for before, after, desc in mode_patterns:
+    for before, after, desc in MODE_PATTERNS:
         item_id += 1
-        items.append({
-            "id": f"din_mode_{item_id:03d}",
-            "category": "register_mode",
-            "difficulty": 1,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
+        yield BenchmarkItem(
+            id=f"din_mode_{item_id:03d}",
+            category="register_mode",
+            difficulty=1,
+            code=before,
+            expected_output=after,
+            metadata={"description": desc, "task": "optimize"},
+        )
 
     # Add increment/decrement patterns
-    for addr in zp_addrs[:5]:
+    for addr in ZP_ADDRS[:5]:
         item_id += 1
-        items.append({
-            "id": f"din_inc_{item_id:03d}",
-            "category": "increment_decrement",
-            "difficulty": 1,
-            "code": f"LDA {addr}\nCLC\nADC #$01\nSTA {addr}",
-            "expected_output": f"INC {addr}",
-            "metadata": {"description": "Use INC instead of LDA/ADC/STA", "task": "optimize"},
-        })
+        yield BenchmarkItem(
+            id=f"din_inc_{item_id:03d}",
+            category="increment_decrement",
+            difficulty=1,
+            code=f"LDA {addr}\nCLC\nADC #$01\nSTA {addr}",
+            expected_output=f"INC {addr}",
+            metadata={"description": "Use INC instead of LDA/ADC/STA", "task": "optimize"},
+        )
         item_id += 1
-        items.append({
-            "id": f"din_dec_{item_id:03d}",
-            "category": "increment_decrement",
-            "difficulty": 1,
-            "code": f"LDA {addr}\nSEC\nSBC #$01\nSTA {addr}",
-            "expected_output": f"DEC {addr}",
-            "metadata": {"description": "Use DEC instead of LDA/SBC/STA", "task": "optimize"},
-        })
+        yield BenchmarkItem(
+            id=f"din_dec_{item_id:03d}",
+            category="increment_decrement",
+            difficulty=1,
+            code=f"LDA {addr}\nSEC\nSBC #$01\nSTA {addr}",
+            expected_output=f"DEC {addr}",
+            metadata={"description": "Use DEC instead of LDA/SBC/STA", "task": "optimize"},
+        )
 
     # Add loop optimization patterns
-    loop_sizes = [8, 16, 32, 64]
-    for size in loop_sizes:
-        item_id += 1
-        items.append({
-            "id": f"din_loop_{item_id:03d}",
-            "category": "loop_optimization",
-            "difficulty": 2,
-            "code": f"LDX #$00\nloop:\nLDA $1000,X\nSTA $2000,X\nINX\nCPX #${size:02X}\nBNE loop",
-            "expected_output": f"LDX #${size-1:02X}\nloop:\nLDA $1000,X\nSTA $2000,X\nDEX\nBPL loop",
-            "metadata": {"description": f"Count down to avoid CPX (size={size})", "task": "optimize"},
-        })
-
-    # Add shift/multiply optimizations
-    multiply_patterns = [
-        ("ASL A\nASL A\nASL A", "ASL A\nASL A\nASL A", "Multiply by 8 via shifts"),
-        ("LDA $10\nASL A\nCLC\nADC $10", "LDA $10\nSTA $00\nASL A\nADC $00", "Multiply by 3"),
-        ("LDA $10\nASL A\nASL A\nCLC\nADC $10", "LDA $10\nSTA $00\nASL A\nASL A\nADC $00", "Multiply by 5"),
-        ("LDA $10\nASL A\nASL A\nASL A\nSEC\nSBC $10", "LDA $10\nSTA $00\nASL A\nASL A\nASL A\nSBC $00", "Multiply by 7"),
-    ]
-    for before, after, desc in multiply_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_mult_{item_id:03d}",
-            "category": "multiplication",
-            "difficulty": 2,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add branch simplification patterns
-    branch_patterns = [
-        ("CMP #$00\nBEQ label", "BEQ label", "CMP #$00 redundant before BEQ"),
-        ("CMP #$00\nBNE label", "BNE label", "CMP #$00 redundant before BNE"),
-        ("LDA $10\nCMP #$00\nBEQ label", "LDA $10\nBEQ label", "LDA sets Z flag"),
-        ("LDA $10\nCMP #$00\nBNE label", "LDA $10\nBNE label", "LDA sets Z flag"),
-        ("AND #$FF\nBNE label", "BNE label", "AND #$FF is identity"),
-        ("ORA #$00\nBNE label", "BNE label", "ORA #$00 is identity"),
-        ("EOR #$00\nBNE label", "BNE label", "EOR #$00 is identity"),
-        ("ASL A\nLSR A\nBNE label", "AND #$FE\nBNE label", "Shift pair clears bit 0"),
-    ]
-    for before, after, desc in branch_patterns:
+    for size in LOOP_SIZES:
         item_id += 1
-        items.append({
-            "id": f"din_branch_{item_id:03d}",
-            "category": "branch_optimization",
-            "difficulty": 1,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add addressing mode optimizations
-    addressing_patterns = [
-        ("LDA $7E0000", "LDA $0000", "Use absolute instead of long for bank $7E"),
-        ("STA $7E0010", "STA $10", "Use zero page for low addresses"),
-        ("LDA #$00\nLDA $10,X", "LDA $10,X", "Redundant LDA before indexed"),
-        ("TXA\nTAY\nLDA table,Y", "LDA table,X", "Use X directly for index"),
-        ("PHA\nTXA\nTAY\nPLA\nLDA table,Y", "LDA table,X", "Complex index transfer"),
-    ]
-    for before, after, desc in addressing_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_addr_{item_id:03d}",
-            "category": "addressing_mode",
-            "difficulty": 2,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add 16-bit operation optimizations
-    word_patterns = [
-        ("LDA $10\nSTA $20\nLDA $11\nSTA $21", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Use 16-bit copy"),
-        ("STZ $10\nSTZ $11", "REP #$20\nSTZ $10\nSEP #$20", "Use 16-bit STZ"),
-        ("LDA $10\nCLC\nADC $12\nSTA $14\nLDA $11\nADC $13\nSTA $15", "REP #$20\nCLC\nLDA $10\nADC $12\nSTA $14\nSEP #$20", "Use 16-bit add"),
-        ("INC $10\nBNE +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Use 16-bit increment"),
-        ("LDA $10\nORA $11\nBNE label", "REP #$20\nLDA $10\nSEP #$20\nBNE label", "16-bit zero check"),
-    ]
-    for before, after, desc in word_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_word_{item_id:03d}",
-            "category": "16bit_optimization",
-            "difficulty": 2,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add stack optimizations
-    stack_patterns = [
-        ("PHA\nPLA", "", "Push/pull with no use"),
-        ("PHA\nTAX\nPLA", "TAX", "Save A around transfer"),
-        ("PHA\nPHX\nPLX\nPLA", "PHA\nPLA", "Unnecessary X push"),
-        ("PHP\nCLC\nPLP", "CLC", "Unnecessary processor save"),
-        ("PHA\nLDA $10\nSTA $20\nPLA", "LDA $10\nSTA $20", "A not needed after"),
-    ]
-    for before, after, desc in stack_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_stack_{item_id:03d}",
-            "category": "stack_optimization",
-            "difficulty": 1,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add dead code removal patterns
-    dead_code_patterns = [
-        ("LDA $10\nLDA $11", "LDA $11", "First LDA overwritten"),
-        ("STA $10\nSTA $10", "STA $10", "Duplicate store"),
-        ("STZ $10\nLDA #$00\nSTA $10", "STZ $10", "Store zero twice"),
-        ("INC $10\nDEC $10", "", "Increment then decrement"),
-        ("SEC\nCLC\nADC $10", "CLC\nADC $10", "SEC overwritten by CLC"),
-        ("REP #$20\nSEP #$20\nLDA $10", "LDA $10", "Mode switch cancelled"),
-        ("NOP\nNOP\nNOP", "", "Remove NOPs"),
-    ]
-    for before, after, desc in dead_code_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_dead_{item_id:03d}",
-            "category": "dead_code",
-            "difficulty": 1,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
-
-    # Add strength reduction patterns
-    strength_patterns = [
-        ("LDA $10\nCLC\nADC #$01\nSTA $10", "INC $10", "ADC #$01 to INC"),
-        ("LDA $10\nSEC\nSBC #$01\nSTA $10", "DEC $10", "SBC #$01 to DEC"),
-        ("LDA $10\nASL A\nSTA $10", "ASL $10", "In-memory shift"),
-        ("LDA $10\nLSR A\nSTA $10", "LSR $10", "In-memory shift right"),
-        ("LDA $10\nROL A\nSTA $10", "ROL $10", "In-memory rotate"),
-        ("LDX $10\nINX\nSTX $10", "INC $10", "Via X to INC"),
-        ("LDY $10\nDEY\nSTY $10", "DEC $10", "Via Y to DEC"),
-    ]
-    for before, after, desc in strength_patterns:
-        item_id += 1
-        items.append({
-            "id": f"din_strength_{item_id:03d}",
-            "category": "strength_reduction",
-            "difficulty": 1,
-            "code": before,
-            "expected_output": after,
-            "metadata": {"description": desc, "task": "optimize"},
-        })
+        yield BenchmarkItem(
+            id=f"din_loop_{item_id:03d}",
+            category="loop_optimization",
+            difficulty=2,
+            code=f"LDX #$00\nloop:\nLDA $1000,X\nSTA $2000,X\nINX\nCPX #${size:02X}\nBNE loop",
+            expected_output=f"LDX #${size-1:02X}\nloop:\nLDA $1000,X\nSTA $2000,X\nDEX\nBPL loop",
+            metadata={"description": f"Count down to avoid CPX (size={size})", "task": "optimize"},
+        )
+
+    # Add the table-driven sections (shifts, branches, addressing, ...)
+    for prefix, category, diff_level, patterns in DIN_SECTIONS:
+        for before, after, desc in patterns:
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"{prefix}{item_id:03d}",
+                category=category,
+                difficulty=diff_level,
+                code=before,
+                expected_output=after,
+                metadata={"description": desc, "task": "optimize"},
+            )
 
     # Add Oracle patterns for Din
-    if "din" in ORACLE_PATTERNS:
-        for name, pattern in ORACLE_PATTERNS["din"].items():
-            if isinstance(pattern, tuple) and len(pattern) >= 3:
-                before, after, desc = pattern[:3]
-                item_id += 1
-                items.append({
-                    "id": f"din_oracle_{item_id:03d}",
-                    "category": "oracle_" + name,
-                    "difficulty": 3,  # Advanced
-                    "code": before,
-                    "expected_output": after,
-                    "metadata": {
-                        "description": desc,
-                        "task": "optimize",
-                        "source": "oracle-of-secrets",
-                    },
-                })
+    for name, pattern in ORACLE_PATTERNS.get("din", {}).items():
+        if isinstance(pattern, tuple) and len(pattern) >= 3:
+            before, after, desc = pattern[:3]
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"din_oracle_{item_id:03d}",
+                category="oracle_" + name,
+                difficulty=3,  # Advanced
+                code=before,
+                expected_output=after,
+                metadata={
+                    "description": desc,
+                    "task": "optimize",
+                    "source": "oracle-of-secrets",
+                },
+            )
 
-    return items
 
+# Synthetic Farore bugs: (buggy, fix, issue)
+MODE_BUGS = (
+    ("LDA #$1234\nSTA $10", "REP #$20\nLDA #$1234\nSTA $10\nSEP #$20", "16-bit value in 8-bit mode"),
+    ("LDA #$ABCD\nSTA $20", "REP #$20\nLDA #$ABCD\nSTA $20\nSEP #$20", "16-bit value in 8-bit mode"),
+    ("REP #$20\nLDA $10\nSEP #$20\nSTA $20", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Store before mode switch"),
+    ("LDX #$1000\nSTX $10", "REP #$10\nLDX #$1000\nSTX $10\nSEP #$10", "16-bit X in 8-bit mode"),
+)
+STACK_BUGS = (
+    ("PHA\nPHX\nJSR sub\nPLA\nRTS", "PHA\nPHX\nJSR sub\nPLX\nPLA\nRTS", "Missing PLX"),
+    ("PHP\nPHA\nJSR sub\nPLA\nRTS", "PHP\nPHA\nJSR sub\nPLA\nPLP\nRTS", "Missing PLP"),
+    ("PHY\nPHX\nPHA\nJSR sub\nPLA\nPLX\nRTS", "PHY\nPHX\nPHA\nJSR sub\nPLA\nPLX\nPLY\nRTS", "Missing PLY"),
+)
+DMA_BUGS = (
+    ("LDA #$01\nSTA $4300\nLDA #$18\nSTA $4301\nLDA #<src\nSTA $4302\nLDA #>src\nSTA $4303\nLDA #$01\nSTA $420B",
+     "LDA #$01\nSTA $4300\nLDA #$18\nSTA $4301\nLDA #<src\nSTA $4302\nLDA #>src\nSTA $4303\nLDA #^src\nSTA $4304\nLDA #$01\nSTA $420B",
+     "Missing DMA source bank register $4304"),
+)
+REG_BUGS = (
+    ("LDA $10\nJSR calc\nSTA $20", "PHA\nJSR calc\nPLA\nSTA $20", "A corrupted by subroutine"),
+    ("LDX $10\nJSR calc\nSTX $20", "PHX\nJSR calc\nPLX\nSTX $20", "X corrupted by subroutine"),
+    ("TXA\nJSR calc\nTAX\nSTX $20", "PHX\nJSR calc\nPLX\nSTX $20", "Register transfer doesn't preserve"),
+    ("LDY $10\nJSR calc\nSTY $20", "PHY\nJSR calc\nPLY\nSTY $20", "Y corrupted by subroutine"),
+    ("LDA $10\nLDX $11\nJSR calc\nSTA $20\nSTX $21", "PHA\nPHX\nJSR calc\nPLX\nPLA\nSTA $20\nSTX $21", "A and X corrupted"),
+)
+CARRY_BUGS = (
+    ("LDA $10\nADC $12\nSTA $14", "CLC\nLDA $10\nADC $12\nSTA $14", "Missing CLC before ADC"),
+    ("LDA $10\nSBC $12\nSTA $14", "SEC\nLDA $10\nSBC $12\nSTA $14", "Missing SEC before SBC"),
+    ("LDA $10\nADC #$10\nADC #$20\nSTA $14", "CLC\nLDA $10\nADC #$10\nCLC\nADC #$20\nSTA $14", "Carry propagation between ADCs"),
+    ("CLC\nLDA $10\nADC $11\nLDA $12\nADC $13\nSTA $14", "CLC\nLDA $10\nADC $11\nCLC\nLDA $12\nADC $13\nSTA $14", "Carry not cleared between operations"),
+)
+VBLANK_BUGS = (
+    ("STA $2118", "LDA $4212\nAND #$80\nBEQ -\nSTA $2118", "VRAM write outside VBLANK"),
+    ("STA $2122", "LDA $4212\nAND #$80\nBEQ -\nSTA $2122", "CGRAM write outside VBLANK"),
+    ("STZ $2104", "LDA $4212\nAND #$80\nBEQ -\nSTZ $2104", "OAM write outside VBLANK"),
+    ("LDA #$80\nSTA $2100\nSTA $2118", "LDA #$80\nSTA $2100\nWAI\nSTA $2118", "No wait after force blank"),
+)
+IRQ_BUGS = (
+    ("IRQ:\nLDA $10\nSTA $20\nRTI", "IRQ:\nPHA\nLDA $10\nSTA $20\nPLA\nRTI", "IRQ doesn't preserve A"),
+    ("IRQ:\nPHA\nLDA $10\nSTA $20\nPLA\nRTI", "IRQ:\nPHA\nPHX\nLDA $10\nSTA $20\nPLX\nPLA\nRTI", "IRQ doesn't preserve X (if used)"),
+    ("NMI:\nINC $10\nRTS", "NMI:\nINC $10\nRTI", "Using RTS instead of RTI"),
+    ("NMI:\nPHA\nPHX\nJSR handler\nPLA\nPLX\nRTI", "NMI:\nPHA\nPHX\nJSR handler\nPLX\nPLA\nRTI", "Stack pull order reversed"),
+)
+ADDR_BUGS = (
+    ("LDA $00,X\n; X > $FF", "LDA $0000,X", "Zero page wrap-around with X > 255"),
+    ("STA ($10)\n; DP not 0", "STA [$10]", "Direct page indirect vs long indirect"),
+    ("LDA $10,X\n; accessing $7E00xx", "LDA $7E0010,X", "Assuming bank 0 for WRAM access"),
+    ("JMP ($1000)", "JML [$1000]", "JMP indirect doesn't load bank"),
+    ("JSR $018000", "JSL $018000", "Cross-bank call needs JSL"),
+)
+CMP_BUGS = (
+    ("CMP #$10\nBCS greater", "CMP #$10\nBCS greater_or_equal", "BCS includes equal case"),
+    ("CMP #$80\nBPL positive", "CMP #$80\nBCC less_than_128", "Sign flag vs unsigned compare"),
+    ("LDA $10\nCMP $11\nBEQ equal\nBCS greater\nBCC less", "LDA $10\nCMP $11\nBEQ equal\nBCC less\nBCS greater", "BCS/BCC after equal check"),
+    ("CPX #$00\nBEQ done", "DEX\nBMI done", "Simpler zero check"),
+)
+LOOP_BUGS = (
+    ("LDX #$10\n.lp:\nDEX\nBNE .lp", "LDX #$10\n.lp:\nDEX\nBPL .lp", "BNE misses X=0 iteration"),
+    ("LDY #$FF\n.lp:\nINY\nCPY #$10\nBNE .lp", "LDY #$00\n.lp:\nINY\nCPY #$10\nBNE .lp", "Starting Y at wrong value"),
+    ("LDX #$00\n.lp:\nINX\nBNE .lp", "LDX #$00\n.lp:\nINX\nCPX #$10\nBNE .lp", "Infinite loop - no termination"),
+    (".lp:\nDEC $10\nBNE .lp", "LDA $10\n.lp:\nDEC A\nBNE .lp\nSTA $10", "Modifying memory in tight loop"),
+)
+WORD_BUGS = (
+    ("INC $10\nBNE +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Manual 16-bit increment"),
+    ("LDA $10\nCLC\nADC #$01\nSTA $10\nBCC +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Manual carry propagation"),
+    ("LDA $10\nSTA $20\nLDA $11\nSTA $21", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Two 8-bit copies instead of one 16-bit"),
+    ("STZ $10\nSTZ $11\nSTZ $12\nSTZ $13", "REP #$20\nSTZ $10\nSTZ $12\nSEP #$20", "Four STZ instead of two 16-bit"),
+)
+OFFBYONE_BUGS = (
+    ("LDX #$10\n.lp:\nLDA $1000,X\nSTA $2000,X\nDEX\nBNE .lp", "LDX #$0F\n.lp:\nLDA $1000,X\nSTA $2000,X\nDEX\nBPL .lp", "BNE misses index 0"),
+    ("LDY #$00\n.lp:\nSTA $1000,Y\nINY\nCPY #$10\nBCC .lp", "LDY #$00\n.lp:\nSTA $1000,Y\nINY\nCPY #$10\nBNE .lp", "BCC vs BNE for count"),
+    ("LDA #$00\n.lp:\nINC A\nCMP #$10\nBCC .lp", "LDA #$01\n.lp:\nINC A\nCMP #$10\nBCC .lp", "Starting at wrong value"),
+    ("LDX count\n.lp:\nDEX\nBMI .done\nJSR process\nBRA .lp\n.done:", "LDX count\nBEQ .done\n.lp:\nDEX\nJSR process\nBNE .lp\n.done:", "Process called extra time"),
+)
+POINTER_BUGS = (
+    ("LDA #<ptr\nSTA $10", "LDA #<ptr\nSTA $10\nLDA #>ptr\nSTA $11", "Missing high byte of pointer"),
+    ("LDA ($10)\nSTA $20", "LDA ($10),Y\nSTA $20", "Missing Y index for indirect"),
+    ("LDA [$10]\nSTA $20", "LDA [$10]\nSTA $20\nLDA #^bank\nSTA $12", "Long indirect missing bank"),
+    ("LDA table,X\nSTA ($20)", "LDA table,X\nLDY #$00\nSTA ($20),Y", "Indirect store needs Y"),
+)
+TIMING_BUGS = (
+    ("LDA $4218\nAND #$80\nBNE pressed", "LDA $4212\nAND #$01\nBNE -\nLDA $4218\nAND #$80\nBNE pressed", "Reading joypad during auto-read"),
+    ("STA $2118\nSTA $2118", "STA $2118\nLDA $2139\nSTA $2118", "Back-to-back VRAM writes"),
+    ("LDA $2134\nSTA $10", "LDA #$00\nSTA $211B\nLDA #$00\nSTA $211C\nLDA $2134\nSTA $10", "Reading multiplier without delay"),
+    ("STA $4202\nSTA $4203\nLDA $4216", "STA $4202\nSTA $4203\nNOP\nNOP\nLDA $4216", "Reading multiply result too fast"),
+)
+BANK_BUGS = (
+    ("JSR $FF00\n; crosses bank", "JSL $01FF00", "JSR can't cross bank boundary"),
+    ("JMP $FFFF\n; next instruction at $10000", "JML $010000", "JMP wraps within bank"),
+    ("BRA +127\n; target is 200 bytes away", "BRL target", "BRA range exceeded"),
+    ("LDA $FFFF,X\n; X=$10", "LDA.l $00FFFF,X", "Indexed access crosses bank"),
+)
+FLAG_BUGS = (
+    ("PHP\nREP #$20\nPLP\nLDA $10", "PHP\nREP #$20\nLDA $10\nPLP", "PLP restores wrong mode"),
+    ("SEI\nJSR handler\nCLI", "PHP\nSEI\nJSR handler\nPLP", "CLI unconditionally enables IRQ"),
+    ("CLV\nADC $10\nBVC nooverflow", "ADC $10\nBVC nooverflow", "CLV before ADC hides overflow"),
+    ("SEC\nROR A\nCLC\nROR A", "ROR A\nROR A", "Unnecessary flag manipulation"),
+)
+INIT_BUGS = (
+    ("LDA $10\nBEQ done", "STZ $10\nLDA $10\nBEQ done", "Uninitialized memory read"),
+    ("LDX #$00\nSTX $10\n.lp:\nINC $10\nBNE .lp", "STZ $10\n.lp:\nINC $10\nBNE .lp", "Redundant LDX for STZ"),
+    ("LDA $10\nSTA $20", "STZ $10\nLDA $10\nSTA $20", "Missing init before use"),
+    ("TXA\nSTA $10", "PHX\nTXA\nSTA $10\nPLX", "TXA clobbers A without save"),
+)
+SIGNED_BUGS = (
+    ("CMP #$80\nBCS negative", "CMP #$80\nBMI negative", "BCS doesn't work for signed"),
+    ("LDA $10\nCMP #$00\nBCS positive", "LDA $10\nBPL positive", "Signed positive check"),
+    ("LDA $10\nSEC\nSBC $11\nBMI less", "LDA $10\nCMP $11\nBMI less", "Subtraction vs compare"),
+    ("LDA $10\nCLC\nADC #$80\nBCS overflow", "LDA $10\nCLC\nADC #$80\nBVS overflow", "Signed overflow check"),
+)
+MEM_BUGS = (
+    ("LDA $1FFF,X\n; X = $10", "LDA $1FFF,X", "Correct but document page crossing"),
+    ("LDA ($FE),Y\n; Y > $01", "LDA [$FE],Y", "Indirect wrap at page boundary"),
+    ("STA $FFFF", "STA.l $00FFFF", "Ambiguous bank access"),
+    ("LDA $2100", "LDA.l $002100", "Hardware register needs long"),
+)
+SUB_BUGS = (
+    ("JSR far_routine\n; in different bank", "JSL far_routine", "Cross-bank call needs JSL"),
+    ("JSR routine\nRTL", "JSL routine\nRTL", "Mismatched JSR/RTL"),
+    ("JSL routine\nRTS", "JSL routine\nRTL", "Mismatched JSL/RTS"),
+    ("JSR ($1000)\n; indirect call", "JSR ($1000,X)", "Wrong indirect call mode"),
+)
+BIT_BUGS = (
+    ("LDA $10\nAND #$80\nBNE set", "LDA $10\nBMI set", "Use BMI instead of AND"),
+    ("LDA $10\nAND #$01\nBNE odd", "LDA $10\nLSR A\nBCS odd", "Use carry for bit 0"),
+    ("LDA $10\nORA #$00\nSTA $10", "LDA $10\nSTA $10", "ORA #$00 does nothing"),
+    ("LDA $10\nEOR #$00\nSTA $10", "LDA $10\nSTA $10", "EOR #$00 does nothing"),
+    ("LDA $10\nAND #$FF\nSTA $10", "LDA $10\nSTA $10", "AND #$FF does nothing"),
+)
 
-def generate_farore_benchmarks() -> list[dict]:
-    """Generate Farore debugging benchmark items."""
-    items = []
-    item_id = 0
 
-    difficulty_map = {"basic": 1, "intermediate": 2, "advanced": 3, "expert": 4}
+# Farore sections emitted by one loop, in order: (id prefix, category, difficulty, symptom, bugs)
+FARORE_SECTIONS = (
+    ("farore_dma_", "dma_issues", 2, "Wrong data transferred", DMA_BUGS),
+    ("farore_reg_", "register_corruption", 2, "Wrong value stored", REG_BUGS),
+    ("farore_carry_", "carry_flag", 1, "Incorrect arithmetic result", CARRY_BUGS),
+    ("farore_vblank_", "vblank_timing", 2, "Graphical corruption", VBLANK_BUGS),
+    ("farore_irq_", "interrupt_handling", 3, "Register corruption or crash", IRQ_BUGS),
+    ("farore_addr_", "addressing_mode", 2, "Accessing wrong memory location", ADDR_BUGS),
+    ("farore_cmp_", "comparison_logic", 2, "Wrong branch taken", CMP_BUGS),
+    ("farore_loop_", "loop_termination", 2, "Loop runs wrong number of times", LOOP_BUGS),
+    ("farore_word_", "16bit_operations", 2, "Inefficient or incorrect word operation", WORD_BUGS),
+    ("farore_obo_", "off_by_one", 2, "Wrong iteration count", OFFBYONE_BUGS),
+    ("farore_ptr_", "pointer_bugs", 2, "Accessing wrong memory", POINTER_BUGS),
+    ("farore_timing_", "timing_issues", 3, "Incorrect or corrupted data", TIMING_BUGS),
+    ("farore_bank_", "bank_boundary", 3, "Jump to wrong location", BANK_BUGS),
+    ("farore_flag_", "flag_state", 2, "Wrong flag state", FLAG_BUGS),
+    ("farore_init_", "initialization", 1, "Undefined behavior", INIT_BUGS),
+    ("farore_signed_", "signed_arithmetic", 2, "Wrong comparison result", SIGNED_BUGS),
+    ("farore_mem_", "memory_access", 2, "Reading wrong address", MEM_BUGS),
+    ("farore_sub_", "subroutine_call", 2, "Wrong return or crash", SUB_BUGS),
+    ("farore_bit_", "bit_manipulation", 1, "Inefficient or incorrect", BIT_BUGS),
+)
+
+
+def generate_farore_benchmarks() -> Iterator[BenchmarkItem]:
+    """Yield Farore debugging benchmark items."""
+    item_id = 0
 
     for difficulty, categories in FARORE_BUGS.items():
-        diff_level = difficulty_map.get(difficulty, 1)
+        diff_level = DIFFICULTY_MAP.get(difficulty, 1)
+        id_prefix = f"farore_{difficulty}_"
 
         for category, bugs in categories.items():
             for bug in bugs:
                 item_id += 1
-                items.append({
-                    "id": f"farore_{difficulty}_{item_id:03d}",
-                    "category": category,
-                    "difficulty": diff_level,
-                    "code": bug.get("buggy", ""),
-                    "expected_output": bug.get("fix", ""),
-                    "metadata": {
+                yield BenchmarkItem(
+                    id=f"{id_prefix}{item_id:03d}",
+                    category=category,
+                    difficulty=diff_level,
+                    code=bug.get("buggy", ""),
+                    expected_output=bug.get("fix", ""),
+                    metadata={
                         "issue": bug.get("issue", ""),
                         "explanation": bug.get("explanation", ""),
                         "symptom": bug.get("issue", "unexpected behavior"),
                     },
-                })
+                )
 
     # Add synthetic mode mismatch bugs
-    mode_bugs = [
-        ("LDA #$1234\nSTA $10", "REP #$20\nLDA #$1234\nSTA $10\nSEP #$20", "16-bit value in 8-bit mode"),
-        ("LDA #$ABCD\nSTA $20", "REP #$20\nLDA #$ABCD\nSTA $20\nSEP #$20", "16-bit value in 8-bit mode"),
-        ("REP #$20\nLDA $10\nSEP #$20\nSTA $20", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Store before mode switch"),
-        ("LDX #$1000\nSTX $10", "REP #$10\nLDX #$1000\nSTX $10\nSEP #$10", "16-bit X in 8-bit mode"),
-    ]
-    for buggy, fix, issue in mode_bugs:
+    for buggy, fix, issue in MODE_BUGS:
         item_id += 1
-        items.append({
-            "id": f"farore_mode_{item_id:03d}",
-            "category": "mode_mismatch",
-            "difficulty": 1,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Only low byte stored"},
-        })
+        yield BenchmarkItem(
+            id=f"farore_mode_{item_id:03d}",
+            category="mode_mismatch",
+            difficulty=1,
+            code=buggy,
+            expected_output=fix,
+            metadata={"issue": issue, "symptom": "Only low byte stored"},
+        )
 
     # Add stack imbalance bugs
-    stack_bugs = [
-        ("PHA\nPHX\nJSR sub\nPLA\nRTS", "PHA\nPHX\nJSR sub\nPLX\nPLA\nRTS", "Missing PLX"),
-        ("PHP\nPHA\nJSR sub\nPLA\nRTS", "PHP\nPHA\nJSR sub\nPLA\nPLP\nRTS", "Missing PLP"),
-        ("PHY\nPHX\nPHA\nJSR sub\nPLA\nPLX\nRTS", "PHY\nPHX\nPHA\nJSR sub\nPLA\nPLX\nPLY\nRTS", "Missing PLY"),
-    ]
-    for buggy, fix, issue in stack_bugs:
+    for buggy, fix, issue in STACK_BUGS:
         item_id += 1
-        items.append({
-            "id": f"farore_stack_{item_id:03d}",
-            "category": "stack_imbalance",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Crash on RTS - wrong return address"},
-        })
+        yield BenchmarkItem(
+            id=f"farore_stack_{item_id:03d}",
+            category="stack_imbalance",
+            difficulty=2,
+            code=buggy,
+            expected_output=fix,
+            metadata={"issue": issue, "symptom": "Crash on RTS - wrong return address"},
+        )
 
     # Add branch range bugs
     for distance in [150, 200, 256]:
         item_id += 1
-        items.append({
-            "id": f"farore_branch_{item_id:03d}",
-            "category": "branch_range",
-            "difficulty": 1,
-            "code": f"BRA far_label  ; {distance} bytes away",
-            "expected_output": "BRL far_label  ; Use long branch",
-            "metadata": {"issue": f"Branch target {distance} bytes away exceeds BRA range", "symptom": "Assembler error"},
-        })
-
-    # Add DMA bugs (missing bank)
-    dma_bugs = [
-        ("LDA #$01\nSTA $4300\nLDA #$18\nSTA $4301\nLDA #<src\nSTA $4302\nLDA #>src\nSTA $4303\nLDA #$01\nSTA $420B",
-         "LDA #$01\nSTA $4300\nLDA #$18\nSTA $4301\nLDA #<src\nSTA $4302\nLDA #>src\nSTA $4303\nLDA #^src\nSTA $4304\nLDA #$01\nSTA $420B",
-         "Missing DMA source bank register $4304"),
-    ]
-    for buggy, fix, issue in dma_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_dma_{item_id:03d}",
-            "category": "dma_issues",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong data transferred"},
-        })
-
-    # Add register corruption bugs
-    reg_bugs = [
-        ("LDA $10\nJSR calc\nSTA $20", "PHA\nJSR calc\nPLA\nSTA $20", "A corrupted by subroutine"),
-        ("LDX $10\nJSR calc\nSTX $20", "PHX\nJSR calc\nPLX\nSTX $20", "X corrupted by subroutine"),
-        ("TXA\nJSR calc\nTAX\nSTX $20", "PHX\nJSR calc\nPLX\nSTX $20", "Register transfer doesn't preserve"),
-        ("LDY $10\nJSR calc\nSTY $20", "PHY\nJSR calc\nPLY\nSTY $20", "Y corrupted by subroutine"),
-        ("LDA $10\nLDX $11\nJSR calc\nSTA $20\nSTX $21", "PHA\nPHX\nJSR calc\nPLX\nPLA\nSTA $20\nSTX $21", "A and X corrupted"),
-    ]
-    for buggy, fix, issue in reg_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_reg_{item_id:03d}",
-            "category": "register_corruption",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong value stored"},
-        })
-
-    # Add carry flag bugs
-    carry_bugs = [
-        ("LDA $10\nADC $12\nSTA $14", "CLC\nLDA $10\nADC $12\nSTA $14", "Missing CLC before ADC"),
-        ("LDA $10\nSBC $12\nSTA $14", "SEC\nLDA $10\nSBC $12\nSTA $14", "Missing SEC before SBC"),
-        ("LDA $10\nADC #$10\nADC #$20\nSTA $14", "CLC\nLDA $10\nADC #$10\nCLC\nADC #$20\nSTA $14", "Carry propagation between ADCs"),
-        ("CLC\nLDA $10\nADC $11\nLDA $12\nADC $13\nSTA $14", "CLC\nLDA $10\nADC $11\nCLC\nLDA $12\nADC $13\nSTA $14", "Carry not cleared between operations"),
-    ]
-    for buggy, fix, issue in carry_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_carry_{item_id:03d}",
-            "category": "carry_flag",
-            "difficulty": 1,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Incorrect arithmetic result"},
-        })
-
-    # Add VBLANK timing bugs
-    vblank_bugs = [
-        ("STA $2118", "LDA $4212\nAND #$80\nBEQ -\nSTA $2118", "VRAM write outside VBLANK"),
-        ("STA $2122", "LDA $4212\nAND #$80\nBEQ -\nSTA $2122", "CGRAM write outside VBLANK"),
-        ("STZ $2104", "LDA $4212\nAND #$80\nBEQ -\nSTZ $2104", "OAM write outside VBLANK"),
-        ("LDA #$80\nSTA $2100\nSTA $2118", "LDA #$80\nSTA $2100\nWAI\nSTA $2118", "No wait after force blank"),
-    ]
-    for buggy, fix, issue in vblank_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_vblank_{item_id:03d}",
-            "category": "vblank_timing",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Graphical corruption"},
-        })
-
-    # Add interrupt handling bugs
-    irq_bugs = [
-        ("IRQ:\nLDA $10\nSTA $20\nRTI", "IRQ:\nPHA\nLDA $10\nSTA $20\nPLA\nRTI", "IRQ doesn't preserve A"),
-        ("IRQ:\nPHA\nLDA $10\nSTA $20\nPLA\nRTI", "IRQ:\nPHA\nPHX\nLDA $10\nSTA $20\nPLX\nPLA\nRTI", "IRQ doesn't preserve X (if used)"),
-        ("NMI:\nINC $10\nRTS", "NMI:\nINC $10\nRTI", "Using RTS instead of RTI"),
-        ("NMI:\nPHA\nPHX\nJSR handler\nPLA\nPLX\nRTI", "NMI:\nPHA\nPHX\nJSR handler\nPLX\nPLA\nRTI", "Stack pull order reversed"),
-    ]
-    for buggy, fix, issue in irq_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_irq_{item_id:03d}",
-            "category": "interrupt_handling",
-            "difficulty": 3,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Register corruption or crash"},
-        })
-
-    # Add addressing mode bugs
-    addr_bugs = [
-        ("LDA $00,X\n; X > $FF", "LDA $0000,X", "Zero page wrap-around with X > 255"),
-        ("STA ($10)\n; DP not 0", "STA [$10]", "Direct page indirect vs long indirect"),
-        ("LDA $10,X\n; accessing $7E00xx", "LDA $7E0010,X", "Assuming bank 0 for WRAM access"),
-        ("JMP ($1000)", "JML [$1000]", "JMP indirect doesn't load bank"),
-        ("JSR $018000", "JSL $018000", "Cross-bank call needs JSL"),
-    ]
-    for buggy, fix, issue in addr_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_addr_{item_id:03d}",
-            "category": "addressing_mode",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Accessing wrong memory location"},
-        })
-
-    # Add comparison logic bugs
-    cmp_bugs = [
-        ("CMP #$10\nBCS greater", "CMP #$10\nBCS greater_or_equal", "BCS includes equal case"),
-        ("CMP #$80\nBPL positive", "CMP #$80\nBCC less_than_128", "Sign flag vs unsigned compare"),
-        ("LDA $10\nCMP $11\nBEQ equal\nBCS greater\nBCC less", "LDA $10\nCMP $11\nBEQ equal\nBCC less\nBCS greater", "BCS/BCC after equal check"),
-        ("CPX #$00\nBEQ done", "DEX\nBMI done", "Simpler zero check"),
-    ]
-    for buggy, fix, issue in cmp_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_cmp_{item_id:03d}",
-            "category": "comparison_logic",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong branch taken"},
-        })
-
-    # Add loop termination bugs
-    loop_bugs = [
-        ("LDX #$10\n.lp:\nDEX\nBNE .lp", "LDX #$10\n.lp:\nDEX\nBPL .lp", "BNE misses X=0 iteration"),
-        ("LDY #$FF\n.lp:\nINY\nCPY #$10\nBNE .lp", "LDY #$00\n.lp:\nINY\nCPY #$10\nBNE .lp", "Starting Y at wrong value"),
-        ("LDX #$00\n.lp:\nINX\nBNE .lp", "LDX #$00\n.lp:\nINX\nCPX #$10\nBNE .lp", "Infinite loop - no termination"),
-        (".lp:\nDEC $10\nBNE .lp", "LDA $10\n.lp:\nDEC A\nBNE .lp\nSTA $10", "Modifying memory in tight loop"),
-    ]
-    for buggy, fix, issue in loop_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_loop_{item_id:03d}",
-            "category": "loop_termination",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Loop runs wrong number of times"},
-        })
-
-    # Add 16-bit operation bugs
-    word_bugs = [
-        ("INC $10\nBNE +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Manual 16-bit increment"),
-        ("LDA $10\nCLC\nADC #$01\nSTA $10\nBCC +\nINC $11\n+", "REP #$20\nINC $10\nSEP #$20", "Manual carry propagation"),
-        ("LDA $10\nSTA $20\nLDA $11\nSTA $21", "REP #$20\nLDA $10\nSTA $20\nSEP #$20", "Two 8-bit copies instead of one 16-bit"),
-        ("STZ $10\nSTZ $11\nSTZ $12\nSTZ $13", "REP #$20\nSTZ $10\nSTZ $12\nSEP #$20", "Four STZ instead of two 16-bit"),
-    ]
-    for buggy, fix, issue in word_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_word_{item_id:03d}",
-            "category": "16bit_operations",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Inefficient or incorrect word operation"},
-        })
-
-    # Add off-by-one bugs
-    offbyone_bugs = [
-        ("LDX #$10\n.lp:\nLDA $1000,X\nSTA $2000,X\nDEX\nBNE .lp", "LDX #$0F\n.lp:\nLDA $1000,X\nSTA $2000,X\nDEX\nBPL .lp", "BNE misses index 0"),
-        ("LDY #$00\n.lp:\nSTA $1000,Y\nINY\nCPY #$10\nBCC .lp", "LDY #$00\n.lp:\nSTA $1000,Y\nINY\nCPY #$10\nBNE .lp", "BCC vs BNE for count"),
-        ("LDA #$00\n.lp:\nINC A\nCMP #$10\nBCC .lp", "LDA #$01\n.lp:\nINC A\nCMP #$10\nBCC .lp", "Starting at wrong value"),
-        ("LDX count\n.lp:\nDEX\nBMI .done\nJSR process\nBRA .lp\n.done:", "LDX count\nBEQ .done\n.lp:\nDEX\nJSR process\nBNE .lp\n.done:", "Process called extra time"),
-    ]
-    for buggy, fix, issue in offbyone_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_obo_{item_id:03d}",
-            "category": "off_by_one",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong iteration count"},
-        })
-
-    # Add pointer bugs
-    pointer_bugs = [
-        ("LDA #<ptr\nSTA $10", "LDA #<ptr\nSTA $10\nLDA #>ptr\nSTA $11", "Missing high byte of pointer"),
-        ("LDA ($10)\nSTA $20", "LDA ($10),Y\nSTA $20", "Missing Y index for indirect"),
-        ("LDA [$10]\nSTA $20", "LDA [$10]\nSTA $20\nLDA #^bank\nSTA $12", "Long indirect missing bank"),
-        ("LDA table,X\nSTA ($20)", "LDA table,X\nLDY #$00\nSTA ($20),Y", "Indirect store needs Y"),
-    ]
-    for buggy, fix, issue in pointer_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_ptr_{item_id:03d}",
-            "category": "pointer_bugs",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Accessing wrong memory"},
-        })
-
-    # Add timing bugs
-    timing_bugs = [
-        ("LDA $4218\nAND #$80\nBNE pressed", "LDA $4212\nAND #$01\nBNE -\nLDA $4218\nAND #$80\nBNE pressed", "Reading joypad during auto-read"),
-        ("STA $2118\nSTA $2118", "STA $2118\nLDA $2139\nSTA $2118", "Back-to-back VRAM writes"),
-        ("LDA $2134\nSTA $10", "LDA #$00\nSTA $211B\nLDA #$00\nSTA $211C\nLDA $2134\nSTA $10", "Reading multiplier without delay"),
-        ("STA $4202\nSTA $4203\nLDA $4216", "STA $4202\nSTA $4203\nNOP\nNOP\nLDA $4216", "Reading multiply result too fast"),
-    ]
-    for buggy, fix, issue in timing_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_timing_{item_id:03d}",
-            "category": "timing_issues",
-            "difficulty": 3,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Incorrect or corrupted data"},
-        })
-
-    # Add bank boundary bugs
-    bank_bugs = [
-        ("JSR $FF00\n; crosses bank", "JSL $01FF00", "JSR can't cross bank boundary"),
-        ("JMP $FFFF\n; next instruction at $10000", "JML $010000", "JMP wraps within bank"),
-        ("BRA +127\n; target is 200 bytes away", "BRL target", "BRA range exceeded"),
-        ("LDA $FFFF,X\n; X=$10", "LDA.l $00FFFF,X", "Indexed access crosses bank"),
-    ]
-    for buggy, fix, issue in bank_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_bank_{item_id:03d}",
-            "category": "bank_boundary",
-            "difficulty": 3,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Jump to wrong location"},
-        })
-
-    # Add flag state bugs
-    flag_bugs = [
-        ("PHP\nREP #$20\nPLP\nLDA $10", "PHP\nREP #$20\nLDA $10\nPLP", "PLP restores wrong mode"),
-        ("SEI\nJSR handler\nCLI", "PHP\nSEI\nJSR handler\nPLP", "CLI unconditionally enables IRQ"),
-        ("CLV\nADC $10\nBVC nooverflow", "ADC $10\nBVC nooverflow", "CLV before ADC hides overflow"),
-        ("SEC\nROR A\nCLC\nROR A", "ROR A\nROR A", "Unnecessary flag manipulation"),
-    ]
-    for buggy, fix, issue in flag_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_flag_{item_id:03d}",
-            "category": "flag_state",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong flag state"},
-        })
-
-    # Add initialization bugs
-    init_bugs = [
-        ("LDA $10\nBEQ done", "STZ $10\nLDA $10\nBEQ done", "Uninitialized memory read"),
-        ("LDX #$00\nSTX $10\n.lp:\nINC $10\nBNE .lp", "STZ $10\n.lp:\nINC $10\nBNE .lp", "Redundant LDX for STZ"),
-        ("LDA $10\nSTA $20", "STZ $10\nLDA $10\nSTA $20", "Missing init before use"),
-        ("TXA\nSTA $10", "PHX\nTXA\nSTA $10\nPLX", "TXA clobbers A without save"),
-    ]
-    for buggy, fix, issue in init_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_init_{item_id:03d}",
-            "category": "initialization",
-            "difficulty": 1,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Undefined behavior"},
-        })
-
-    # Add signed arithmetic bugs
-    signed_bugs = [
-        ("CMP #$80\nBCS negative", "CMP #$80\nBMI negative", "BCS doesn't work for signed"),
-        ("LDA $10\nCMP #$00\nBCS positive", "LDA $10\nBPL positive", "Signed positive check"),
-        ("LDA $10\nSEC\nSBC $11\nBMI less", "LDA $10\nCMP $11\nBMI less", "Subtraction vs compare"),
-        ("LDA $10\nCLC\nADC #$80\nBCS overflow", "LDA $10\nCLC\nADC #$80\nBVS overflow", "Signed overflow check"),
-    ]
-    for buggy, fix, issue in signed_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_signed_{item_id:03d}",
-            "category": "signed_arithmetic",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong comparison result"},
-        })
-
-    # Add memory access bugs
-    mem_bugs = [
-        ("LDA $1FFF,X\n; X = $10", "LDA $1FFF,X", "Correct but document page crossing"),
-        ("LDA ($FE),Y\n; Y > $01", "LDA [$FE],Y", "Indirect wrap at page boundary"),
-        ("STA $FFFF", "STA.l $00FFFF", "Ambiguous bank access"),
-        ("LDA $2100", "LDA.l $002100", "Hardware register needs long"),
-    ]
-    for buggy, fix, issue in mem_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_mem_{item_id:03d}",
-            "category": "memory_access",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Reading wrong address"},
-        })
-
-    # Add subroutine bugs
-    sub_bugs = [
-        ("JSR far_routine\n; in different bank", "JSL far_routine", "Cross-bank call needs JSL"),
-        ("JSR routine\nRTL", "JSL routine\nRTL", "Mismatched JSR/RTL"),
-        ("JSL routine\nRTS", "JSL routine\nRTL", "Mismatched JSL/RTS"),
-        ("JSR ($1000)\n; indirect call", "JSR ($1000,X)", "Wrong indirect call mode"),
-    ]
-    for buggy, fix, issue in sub_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_sub_{item_id:03d}",
-            "category": "subroutine_call",
-            "difficulty": 2,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Wrong return or crash"},
-        })
-
-    # Add bit manipulation bugs
-    bit_bugs = [
-        ("LDA $10\nAND #$80\nBNE set", "LDA $10\nBMI set", "Use BMI instead of AND"),
-        ("LDA $10\nAND #$01\nBNE odd", "LDA $10\nLSR A\nBCS odd", "Use carry for bit 0"),
-        ("LDA $10\nORA #$00\nSTA $10", "LDA $10\nSTA $10", "ORA #$00 does nothing"),
-        ("LDA $10\nEOR #$00\nSTA $10", "LDA $10\nSTA $10", "EOR #$00 does nothing"),
-        ("LDA $10\nAND #$FF\nSTA $10", "LDA $10\nSTA $10", "AND #$FF does nothing"),
-    ]
-    for buggy, fix, issue in bit_bugs:
-        item_id += 1
-        items.append({
-            "id": f"farore_bit_{item_id:03d}",
-            "category": "bit_manipulation",
-            "difficulty": 1,
-            "code": buggy,
-            "expected_output": fix,
-            "metadata": {"issue": issue, "symptom": "Inefficient or incorrect"},
-        })
+        yield BenchmarkItem(
+            id=f"farore_branch_{item_id:03d}",
+            category="branch_range",
+            difficulty=1,
+            code=f"BRA far_label  ; {distance} bytes away",
+            expected_output="BRL far_label  ; Use long branch",
+            metadata={"issue": f"Branch target {distance} bytes away exceeds BRA range", "symptom": "Assembler error"},
+        )
+
+    # Add the table-driven sections (DMA, registers, carry, ...)
+    for prefix, category, diff_level, symptom, bugs in FARORE_SECTIONS:
+        for buggy, fix, issue in bugs:
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"{prefix}{item_id:03d}",
+                category=category,
+                difficulty=diff_level,
+                code=buggy,
+                expected_output=fix,
+                metadata={"issue": issue, "symptom": symptom},
+            )
 
     # Add Oracle Farore patterns
-    if "farore" in ORACLE_PATTERNS:
-        for name, bug_data in ORACLE_PATTERNS["farore"].items():
-            if isinstance(bug_data, dict):
-                item_id += 1
-                items.append({
-                    "id": f"farore_oracle_{item_id:03d}",
-                    "category": "oracle_" + name,
-                    "difficulty": 3,
-                    "code": bug_data.get("buggy", ""),
-                    "expected_output": bug_data.get("fix", ""),
-                    "metadata": {
-                        "issue": bug_data.get("issue", ""),
-                        "explanation": bug_data.get("explanation", ""),
-                        "source": "oracle-of-secrets",
-                    },
-                })
-
-    return items
+    for name, bug_data in ORACLE_PATTERNS.get("farore", {}).items():
+        if isinstance(bug_data, dict):
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"farore_oracle_{item_id:03d}",
+                category="oracle_" + name,
+                difficulty=3,
+                code=bug_data.get("buggy", ""),
+                expected_output=bug_data.get("fix", ""),
+                metadata={
+                    "issue": bug_data.get("issue", ""),
+                    "explanation": bug_data.get("explanation", ""),
+                    "source": "oracle-of-secrets",
+                },
+            )
 
 
-def generate_nayru_benchmarks() -> list[dict]:
-    """Generate Nayru code generation benchmark items."""
-    items = []
+def generate_nayru_benchmarks() -> Iterator[BenchmarkItem]:
+    """Yield Nayru code generation benchmark items."""
     item_id = 0
 
-    difficulty_map = {"basic": 1, "intermediate": 2, "advanced": 3, "expert": 4}
-
     for difficulty, templates in NAYRU_TEMPLATES.items():
-        diff_level = difficulty_map.get(difficulty, 1)
+        diff_level = DIFFICULTY_MAP.get(difficulty, 1)
+        id_prefix = f"nayru_{difficulty}_"
 
         for template in templates:
             item_id += 1
             task = template.get("task", "")
             code = template.get("code", "")
 
-            items.append({
-                "id": f"nayru_{difficulty}_{item_id:03d}",
-                "category": "generation",
-                "difficulty": diff_level,
-                "code": task,  # Task description as "code" field
-                "expected_output": code.strip(),
-                "metadata": {
+            yield BenchmarkItem(
+                id=f"{id_prefix}{item_id:03d}",
+                category="generation",
+                difficulty=diff_level,
+                code=task,  # Task description as "code" field
+                expected_output=code.strip(),
+                metadata={
                     "task": task,
                     "expected_entities": [],
                 },
-            })
+            )
 
     # Expanded hardware-based tasks
     hw_tasks = [
@@ -851,30 +635,30 @@ def generate_nayru_benchmarks() -> list[dict]:
     ]
     for task, entities in basic_tasks:
         item_id += 1
-        items.append({
-            "id": f"nayru_basic_{item_id:03d}",
-            "category": "basic_ops",
-            "difficulty": 1,
-            "code": task,
-            "metadata": {"task": task, "expected_entities": entities},
-        })
+        yield BenchmarkItem(
+            id=f"nayru_basic_{item_id:03d}",
+            category="basic_ops",
+            difficulty=1,
+            code=task,
+            metadata={"task": task, "expected_entities": entities},
+        )
 
     for hw_type, task, entities in hw_tasks:
         item_id += 1
         hw_info = NAYRU_HARDWARE.get(hw_type, {})
         context = hw_info.get("description", "")
 
-        items.append({
-            "id": f"nayru_hw_{item_id:03d}",
-            "category": hw_type,
-            "difficulty": 2,
-            "code": task,
-            "metadata": {
+        yield BenchmarkItem(
+            id=f"nayru_hw_{item_id:03d}",
+            category=hw_type,
+            difficulty=2,
+            code=task,
+            metadata={
                 "task": task,
                 "context": context,
                 "expected_entities": entities,
             },
-        })
+        )
 
     # Add intermediate generation tasks
     intermediate_tasks = [
@@ -901,13 +685,13 @@ def generate_nayru_benchmarks() -> list[dict]:
     ]
     for task, entities in intermediate_tasks:
         item_id += 1
-        items.append({
-            "id": f"nayru_inter_{item_id:03d}",
-            "category": "intermediate_ops",
-            "difficulty": 2,
-            "code": task,
-            "metadata": {"task": task, "expected_entities": entities},
-        })
+        yield BenchmarkItem(
+            id=f"nayru_inter_{item_id:03d}",
+            category="intermediate_ops",
+            difficulty=2,
+            code=task,
+            metadata={"task": task, "expected_entities": entities},
+        )
 
     # Add advanced generation tasks
     advanced_tasks = [
@@ -929,13 +713,13 @@ def generate_nayru_benchmarks() -> list[dict]:
     ]
     for task, entities in advanced_tasks:
         item_id += 1
-        items.append({
-            "id": f"nayru_adv_{item_id:03d}",
-            "category": "advanced_ops",
-            "difficulty": 3,
-            "code": task,
-            "metadata": {"task": task, "expected_entities": entities},
-        })
+        yield BenchmarkItem(
+            id=f"nayru_adv_{item_id:03d}",
+            category="advanced_ops",
+            difficulty=3,
+            code=task,
+            metadata={"task": task, "expected_entities": entities},
+        )
 
     # Add expert ALTTP-specific tasks
     alttp_tasks = [
@@ -964,58 +748,53 @@ def generate_nayru_benchmarks() -> list[dict]:
     ]
     for task, entities in alttp_tasks:
         item_id += 1
-        items.append({
-            "id": f"nayru_alttp_{item_id:03d}",
-            "category": "alttp_specific",
-            "difficulty": 4,
-            "code": task,
-            "metadata": {"task": task, "expected_entities": entities, "game": "alttp"},
-        })
+        yield BenchmarkItem(
+            id=f"nayru_alttp_{item_id:03d}",
+            category="alttp_specific",
+            difficulty=4,
+            code=task,
+            metadata={"task": task, "expected_entities": entities, "game": "alttp"},
+        )
 
     # Add Oracle Nayru patterns
-    if "nayru" in ORACLE_PATTERNS:
-        for name, code in ORACLE_PATTERNS["nayru"].items():
-            if isinstance(code, str):
-                item_id += 1
-                items.append({
-                    "id": f"nayru_oracle_{item_id:03d}",
-                    "category": "oracle_" + name,
-                    "difficulty": 3,
-                    "code": f"Implement {name.replace('_', ' ')}",
-                    "expected_output": code.strip(),
-                    "metadata": {
-                        "task": name.replace("_", " "),
-                        "source": "oracle-of-secrets",
-                    },
-                })
-
-    return items
+    for name, code in ORACLE_PATTERNS.get("nayru", {}).items():
+        if isinstance(code, str):
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"nayru_oracle_{item_id:03d}",
+                category="oracle_" + name,
+                difficulty=3,
+                code=f"Implement {name.replace('_', ' ')}",
+                expected_output=code.strip(),
+                metadata={
+                    "task": name.replace("_", " "),
+                    "source": "oracle-of-secrets",
+                },
+            )
 
 
-def generate_veran_benchmarks() -> list[dict]:
-    """Generate Veran explanation benchmark items."""
-    items = []
+def generate_veran_benchmarks() -> Iterator[BenchmarkItem]:
+    """Yield Veran explanation benchmark items."""
     item_id = 0
 
-    difficulty_map = {"basic": 1, "intermediate": 2, "advanced": 3, "expert": 4}
-
     for difficulty, examples in VERAN_EXAMPLES.items():
-        diff_level = difficulty_map.get(difficulty, 1)
+        diff_level = DIFFICULTY_MAP.get(difficulty, 1)
+        id_prefix = f"veran_{difficulty}_"
 
         for example in examples:
             item_id += 1
             code = example.get("code", "")
             concepts = example.get("concepts", [])
 
-            items.append({
-                "id": f"veran_{difficulty}_{item_id:03d}",
-                "category": "explanation",
-                "difficulty": diff_level,
-                "code": code.strip(),
-                "metadata": {
+            yield BenchmarkItem(
+                id=f"{id_prefix}{item_id:03d}",
+                category="explanation",
+                difficulty=diff_level,
+                code=code.strip(),
+                metadata={
                     "concepts": concepts,
                 },
-            })
+            )
 
     # Add instruction explanation items
     instructions = [
@@ -1067,13 +846,13 @@ def generate_veran_benchmarks() -> list[dict]:
 
     for code, concepts in instructions:
         item_id += 1
-        items.append({
-            "id": f"veran_instr_{item_id:03d}",
-            "category": "instruction",
-            "difficulty": 1,
-            "code": code,
-            "metadata": {"concepts": concepts},
-        })
+        yield BenchmarkItem(
+            id=f"veran_instr_{item_id:03d}",
+            category="instruction",
+            difficulty=1,
+            code=code,
+            metadata={"concepts": concepts},
+        )
 
     # Add code pattern explanations
     patterns = [
@@ -1099,13 +878,13 @@ def generate_veran_benchmarks() -> list[dict]:
 
     for code, concepts in patterns:
         item_id += 1
-        items.append({
-            "id": f"veran_pattern_{item_id:03d}",
-            "category": "pattern",
-            "difficulty": 2,
-            "code": code,
-            "metadata": {"concepts": concepts},
-        })
+        yield BenchmarkItem(
+            id=f"veran_pattern_{item_id:03d}",
+            category="pattern",
+            difficulty=2,
+            code=code,
+            metadata={"concepts": concepts},
+        )
 
     # Add ASAR syntax examples for explanation
     asar_examples = [
@@ -1118,15 +897,15 @@ def generate_veran_benchmarks() -> list[dict]:
         if isinstance(examples_dict, dict):
             for name, code in examples_dict.items():
                 item_id += 1
-                items.append({
-                    "id": f"veran_asar_{item_id:03d}",
-                    "category": f"asar_{category}",
-                    "difficulty": 2,
-                    "code": code,
-                    "metadata": {
+                yield BenchmarkItem(
+                    id=f"veran_asar_{item_id:03d}",
+                    category=f"asar_{category}",
+                    difficulty=2,
+                    code=code,
+                    metadata={
                         "concepts": ["ASAR syntax", category, name],
                     },
-                })
+                )
 
     # Add SNES hardware register explanations
     register_explanations = [
@@ -1153,13 +932,13 @@ def generate_veran_benchmarks() -> list[dict]:
     ]
     for addr, concepts in register_explanations:
         item_id += 1
-        items.append({
-            "id": f"veran_reg_{item_id:03d}",
-            "category": "hardware_register",
-            "difficulty": 2,
-            "code": addr,
-            "metadata": {"concepts": concepts, "type": "register"},
-        })
+        yield BenchmarkItem(
+            id=f"veran_reg_{item_id:03d}",
+            category="hardware_register",
+            difficulty=2,
+            code=addr,
+            metadata={"concepts": concepts, "type": "register"},
+        )
 
     # Add advanced code pattern explanations
     advanced_patterns = [
@@ -1187,13 +966,13 @@ def generate_veran_benchmarks() -> list[dict]:
     ]
     for code, concepts in advanced_patterns:
         item_id += 1
-        items.append({
-            "id": f"veran_advpat_{item_id:03d}",
-            "category": "advanced_pattern",
-            "difficulty": 3,
-            "code": code,
-            "metadata": {"concepts": concepts},
-        })
+        yield BenchmarkItem(
+            id=f"veran_advpat_{item_id:03d}",
+            category="advanced_pattern",
+            difficulty=3,
+            code=code,
+            metadata={"concepts": concepts},
+        )
 
     # Add ALTTP-specific code explanations
     alttp_patterns = [
@@ -1218,13 +997,13 @@ def generate_veran_benchmarks() -> list[dict]:
     ]
     for code, concepts in alttp_patterns:
         item_id += 1
-        items.append({
-            "id": f"veran_alttp_{item_id:03d}",
-            "category": "alttp_pattern",
-            "difficulty": 3,
-            "code": code,
-            "metadata": {"concepts": concepts, "game": "alttp"},
-        })
+        yield BenchmarkItem(
+            id=f"veran_alttp_{item_id:03d}",
+            category="alttp_pattern",
+            difficulty=3,
+            code=code,
+            metadata={"concepts": concepts, "game": "alttp"},
+        )
 
     # Add complete code examples
     complete_examples = [
@@ -1236,51 +1015,64 @@ def generate_veran_benchmarks() -> list[dict]:
     for name, code in complete_examples:
         if code:
             item_id += 1
-            items.append({
-                "id": f"veran_complete_{item_id:03d}",
-                "category": "complete_routine",
-                "difficulty": 3,
-                "code": code.strip(),
-                "metadata": {
+            yield BenchmarkItem(
+                id=f"veran_complete_{item_id:03d}",
+                category="complete_routine",
+                difficulty=3,
+                code=code.strip(),
+                metadata={
                     "concepts": [name.replace("_", " "), "complete routine", "SNES hardware"],
                 },
-            })
+            )
 
     # Add Oracle Veran patterns (documentation)
-    if "veran" in ORACLE_PATTERNS:
-        for name, doc in ORACLE_PATTERNS["veran"].items():
-            if isinstance(doc, str):
-                item_id += 1
-                items.append({
-                    "id": f"veran_oracle_{item_id:03d}",
-                    "category": "oracle_docs",
-                    "difficulty": 4,
-                    "code": doc.strip()[:500],  # Truncate long docs
-                    "metadata": {
-                        "concepts": ["sprite system", "memory map", "game mechanics"],
-                        "source": "oracle-of-secrets",
-                    },
-                })
-
-    return items
+    for name, doc in ORACLE_PATTERNS.get("veran", {}).items():
+        if isinstance(doc, str):
+            item_id += 1
+            yield BenchmarkItem(
+                id=f"veran_oracle_{item_id:03d}",
+                category="oracle_docs",
+                difficulty=4,
+                code=doc.strip()[:500],  # Truncate long docs
+                metadata={
+                    "concepts": ["sprite system", "memory map", "game mechanics"],
+                    "source": "oracle-of-secrets",
+                },
+            )
 
 
-def save_benchmarks(items: list[dict], output_path: Path) -> int:
-    """Save benchmark items to JSONL file."""
+def save_benchmarks(items: Iterable[BenchmarkItem], output_path: Path) -> int:
+    """Stream benchmark items to a JSONL file, returning how many were written."""
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(output_path, "w") as f:
+    count = 0
+    with open(output_path, "wb") as f:
         for item in items:
-            f.write(json.dumps(item) + "\n")
+            f.write(dumps_line(item.to_dict()))
+            count += 1
+
+    return count
 
-    return len(items)
+
+def inputs_key() -> str:
+    """Hash of everything the benchmarks are generated from: the template libraries and this script."""
+    digest = hashlib.sha256()
+    for path in (template_libraries.__file__, __file__):
+        digest.update(Path(path).read_bytes())
+    return digest.hexdigest()
 
 
 def main():
-    benchmarks_dir = Path(__file__).parent.parent.parent / "benchmarks"
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Regenerate even if the template libraries and this script are unchanged",
+    )
+    args = parser.parse_args()
 
-    print("Generating benchmark datasets from template_libraries...")
-    print()
+    benchmarks_dir = Path(__file__).parent.parent.parent / "benchmarks"
+    metadata_path = benchmarks_dir / "metadata.json"
+    key_path = benchmarks_dir / CACHE_KEY_FILE
 
     # Generate each domain
     domains = [
@@ -1290,15 +1082,30 @@ def main():
         ("veran", generate_veran_benchmarks),
     ]
 
-    total = 0
+    # Skip the rebuild when the last run generated every file from the same inputs
+    key = inputs_key()
+    outputs = [benchmarks_dir / domain / "benchmark.jsonl" for domain, _ in domains] + [metadata_path]
+    if not args.force and all(path.exists() for path in outputs):
+        try:
+            if key_path.read_text() == key:
+                print(f"Benchmarks in {benchmarks_dir} are up to date (use --force to regenerate)")
+                return
+        except FileNotFoundError:
+            pass
+    # Drop the old key first so an interrupted run is never mistaken for a complete one
+    key_path.unlink(missing_ok=True)
+
+    print("Generating benchmark datasets from template_libraries...")
+    print()
+
+    counts = {}
     for domain, generator in domains:
-        items = generator()
         output_path = benchmarks_dir / domain / "benchmark.jsonl"
-        count = save_benchmarks(items, output_path)
-        total += count
+        count = counts[domain] = save_benchmarks(generator(), output_path)
         print(f"  {domain}: {count} items -> {output_path}")
 
     print()
+    total = sum(counts.values())
     print(f"Total: {total} benchmark items generated")
 
     # Update metadata
@@ -1308,19 +1115,22 @@ def main():
         "domains": {
             domain: {
                 "file": f"{domain}/benchmark.jsonl",
-                "count": len(generator())
+                "count": count
             }
-            for domain, generator in domains
+            for domain, count in counts.items()
         },
         "total_items": total,
     }
 
-    metadata_path = benchmarks_dir / "metadata.json"
     with open(metadata_path, "w") as f:
         json.dump(metadata, f, indent=2)
 
     print(f"Metadata saved to {metadata_path}")
 
+    tmp_path = key_path.with_name(CACHE_KEY_FILE + ".tmp")
+    tmp_path.write_text(key)
+    os.replace(tmp_path, key_path)
+
 
 if __name__ == "__main__":
     main()
@@ -5,23 +5,32 @@ Tests each expert model on domain-specific tasks and documents gaps.
 """
 
 import asyncio
-import json
+import hashlib
 import logging
+import os
+import sqlite3
 import sys
 import time
-from dataclasses import dataclass, field
+import urllib.request
+from collections import Counter
+from dataclasses import asdict, dataclass, field
 from datetime import datetime
 from pathlib import Path
 from typing import Any
 
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / "src"))
+# and scripts/afs, for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from utils.jsonio import dumps_indented, dumps_line, json_loads
 from afs.agent import AgentHarness, HarnessConfig, TRIFORCE_TOOLS, ModelConfig
 
 logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
 logger = logging.getLogger(__name__)
 
+RESPONSE_CACHE = Path.home() / ".cache" / "afs" / "triforce_responses.sqlite"
+
 
 @dataclass
 class TestCase:
@@ -33,8 +42,26 @@ class TestCase:
     anti_keywords: list[str] = field(default_factory=list)  # Keywords indicating wrong answer
     category: str = "general"
 
-
-@dataclass
+    def __post_init__(self):
+        # Lowercase the keywords once; every model's response is matched against these
+        self._expected_lc = tuple(kw.lower() for kw in self.expected_keywords)
+        self._anti_lc = tuple(kw.lower() for kw in self.anti_keywords)
+        self._has_any_keywords = bool(self._expected_lc or self._anti_lc)
+
+    def match(self, response: str) -> tuple[list[str], list[str], list[str]]:
+        """Return (found, missing, found_anti) keywords in response, ignoring case."""
+        found = []
+        missing = []
+        if not self._has_any_keywords:
+            return found, missing, []  # nothing to scan for, so skip lowercasing
+        response = response.lower()
+        for kw, kw_lc in zip(self.expected_keywords, self._expected_lc):
+            (found if kw_lc in response else missing).append(kw)
+        found_anti = [kw for kw, kw_lc in zip(self.anti_keywords, self._anti_lc) if kw_lc in response]
+        return found, missing, found_anti
+
+
+@dataclass(slots=True)
 class TestResult:
     """Result from running a test case."""
     test_name: str
@@ -46,6 +73,21 @@ class TestResult:
     error: str | None = None
     missing_keywords: list[str] = field(default_factory=list)
     found_anti_keywords: list[str] = field(default_factory=list)
+    cached: bool = False  # response came from the response cache, so latency_ms is from an earlier run
+
+
+def load_completed(path: Path) -> dict[tuple[str, str], TestResult]:
+    """Load the successful results from a results log, keyed on (expert, test name)."""
+    completed = {}
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                result = TestResult(**json_loads(line))
+            except (ValueError, TypeError):
+                continue  # e.g. a line cut short by a crash
+            if result.error is None:
+                completed[(result.expert, result.test_name)] = result
+    return completed
 
 
 # ============================================================================
@@ -310,16 +352,126 @@ AGAHNIM_TESTS = [
 ]
 
 
+# Expert name -> (model id, test suite)
+EXPERTS: dict[str, tuple[str, list[TestCase]]] = {
+    "nayru": ("nayru-v7:latest", NAYRU_TESTS),
+    "din": ("din-v4:latest", DIN_TESTS),
+    "farore": ("farore-v4:latest", FARORE_TESTS),
+    "veran": ("veran-v2:latest", VERAN_TESTS),
+    "onox": ("onox-v1:latest", ONOX_TESTS),
+    "twinrova": ("twinrova-v1:latest", TWINROVA_TESTS),
+    "agahnim": ("agahnim-v1:latest", AGAHNIM_TESTS),
+}
+
+
 # ============================================================================
 # Evaluation Engine
 # ============================================================================
 
+def model_digests() -> dict[str, str]:
+    """Map each model tag on the Ollama server to its current digest.
+
+    Returns an empty dict if the server can't be reached.
+    """
+    host = os.environ.get("OLLAMA_HOST", "http://localhost:11434")
+    if not host.startswith(("http://", "https://")):
+        host = f"http://{host}"
+    try:
+        with urllib.request.urlopen(f"{host}/api/tags", timeout=5) as resp:
+            models = json_loads(resp.read()).get("models", [])
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not list models at {host} ({e}); response cache disabled")
+        return {}
+    return {m["name"]: m["digest"] for m in models}
+
+
+class ResponseCache:
+    """Persistent store of model responses, so re-runs against the same model skip inference.
+
+    Entries are keyed on the model's digest, not its tag, so retraining and
+    retagging a model (e.g. nayru-v7:latest) doesn't serve the old model's responses.
+    """
+
+    def __init__(self, path: Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, response TEXT NOT NULL, latency_ms REAL NOT NULL)"
+        )
+
+    @staticmethod
+    def key(expert: str, model_digest: str, prompt: str) -> str:
+        # Incidental whitespace edits (trailing spaces, CRLF, surrounding blank
+        # lines) don't change the prompt; line structure and indentation do
+        prompt = "\n".join(line.rstrip() for line in prompt.strip().splitlines())
+        return hashlib.sha256(f"{expert}\0{prompt}\0{model_digest}".encode()).hexdigest()
+
+    def get(self, key: str) -> tuple[str, float] | None:
+        """Return the cached (response, latency_ms of the original run), if any."""
+        return self._conn.execute(
+            "SELECT response, latency_ms FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+
+    def put(self, key: str, response: str, latency_ms: float) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, response, latency_ms)
+        )
+        self._conn.commit()
+
+    def close(self) -> None:
+        self._conn.close()
+
+
 class TriforceEvaluator:
     """Evaluates Triforce expert models."""
 
-    def __init__(self, verbose: bool = False):
+    def __init__(
+        self,
+        verbose: bool = False,
+        max_concurrency: int = 8,
+        max_parallel_experts: int | None = None,
+        cache_path: Path | None = RESPONSE_CACHE,
+        results_log: Path | None = None,
+        resume: bool = False,
+    ):
         self.verbose = verbose
         self.results: list[TestResult] = []
+        self.results_by_expert: dict[str, list[TestResult]] = {}
+        self._gap_report: tuple[int, str] | None = None  # (result count, report)
+        # Shared by every test's harness. The harnesses themselves stay per test:
+        # AgentHarness keeps run history, so one can't serve concurrent tests
+        self.harness_config = HarnessConfig(max_iterations=3, verbose=verbose)
+        # Responses are cached per (expert, prompt, model digest); pass None to always
+        # query the models. Models whose digest can't be resolved are never cached
+        self.cache = ResponseCache(cache_path) if cache_path is not None else None
+        self.model_digests = model_digests() if self.cache is not None else {}
+        # Bounds in-flight model requests across all concurrently running experts
+        self.max_concurrency = max_concurrency
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        # Bounds how many expert suites (and so models) run at once; None runs them all
+        self.max_parallel_experts = max_parallel_experts
+        # Each result is appended to results_log as it completes. With resume,
+        # tests that already succeeded there are not run again.
+        self.completed: dict[tuple[str, str], TestResult] = {}
+        self._log = None
+        if results_log is not None:
+            if resume and results_log.exists():
+                self.completed = load_completed(results_log)
+            self._log = open(results_log, "ab" if resume else "wb")
+            if self._log.tell():
+                with open(results_log, "rb") as f:
+                    f.seek(-1, 2)
+                    if f.read(1) != b"\n":
+                        self._log.write(b"\n")  # end a line cut short by a crash
+
+    def close(self) -> None:
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+        if self.cache is not None:
+            self.cache.close()
+            self.cache = None
 
     async def run_test(
         self,
@@ -327,53 +479,49 @@ class TriforceEvaluator:
         model_id: str,
         test: TestCase,
     ) -> TestResult:
-        """Run a single test case."""
-        start_time = time.time()
+        """Run a single test case, reusing a resumed result or cached response when available."""
+        result = self.completed.get((expert, test.name))
+        if result is not None:
+            return result
+
+        cache_key = None
+        digest = self.model_digests.get(model_id)
+        if self.cache is not None and digest is not None:
+            cache_key = ResponseCache.key(expert, digest, test.prompt)
+            hit = self.cache.get(cache_key)
+            if hit is not None:
+                result = self.score_response(expert, test, *hit, cached=True)
+
+        if result is None:
+            async with self._semaphore:
+                result = await self._run_test(expert, model_id, test, cache_key)
+
+        if self._log is not None:
+            self._log.write(dumps_line(asdict(result)))
+            self._log.flush()
+        return result
+
+    async def _run_test(
+        self,
+        expert: str,
+        model_id: str,
+        test: TestCase,
+        cache_key: str | None,
+    ) -> TestResult:
+        start_ns = time.perf_counter_ns()
 
-        config = HarnessConfig(max_iterations=3, verbose=self.verbose)
-        harness = AgentHarness(model_id, tools=None, config=config)  # Explicitly None to skip tools
+        harness = AgentHarness(model_id, tools=None, config=self.harness_config)  # Explicitly None to skip tools
         harness.tools = {}  # Clear default AFS_TOOLS for models without tool support
 
         try:
             async with harness:
-                result = await harness.run(test.prompt)
-                response = result.response.lower()
-                latency = (time.time() - start_time) * 1000
-
-                # Check expected keywords
-                found_keywords = []
-                missing_keywords = []
-                for kw in test.expected_keywords:
-                    if kw.lower() in response:
-                        found_keywords.append(kw)
-                    else:
-                        missing_keywords.append(kw)
-
-                # Check anti-keywords
-                found_anti = [kw for kw in test.anti_keywords if kw.lower() in response]
-
-                # Calculate score
-                if test.expected_keywords:
-                    score = len(found_keywords) / len(test.expected_keywords)
-                else:
-                    score = 1.0 if not found_anti else 0.0
-
-                # Penalize for anti-keywords
-                if found_anti:
-                    score *= 0.5
-
-                passed = score >= 0.6 and not found_anti
-
-                return TestResult(
-                    test_name=test.name,
-                    expert=expert,
-                    passed=passed,
-                    score=score,
-                    response=result.response[:500],  # Truncate for report
-                    latency_ms=latency,
-                    missing_keywords=missing_keywords,
-                    found_anti_keywords=found_anti,
-                )
+                # Keep only the response text, not the run result with its traces
+                response = (await harness.run(test.prompt)).response
+                latency = (time.perf_counter_ns() - start_ns) / 1e6
+            del harness  # nor the harness's history while scoring
+            if cache_key is not None:
+                self.cache.put(cache_key, response, latency)
+            return self.score_response(expert, test, response, latency)
 
         except Exception as e:
             return TestResult(
@@ -382,30 +530,70 @@ class TriforceEvaluator:
                 passed=False,
                 score=0.0,
                 response="",
-                latency_ms=(time.time() - start_time) * 1000,
+                latency_ms=(time.perf_counter_ns() - start_ns) / 1e6,
                 error=str(e),
             )
 
+    def score_response(
+        self,
+        expert: str,
+        test: TestCase,
+        response: str,
+        latency_ms: float,
+        cached: bool = False,
+    ) -> TestResult:
+        """Score a model response against a test case."""
+        # Check expected keywords and anti-keywords
+        found_keywords, missing_keywords, found_anti = test.match(response)
+
+        # Calculate score
+        if test.expected_keywords:
+            score = len(found_keywords) / len(test.expected_keywords)
+        else:
+            score = 1.0 if not found_anti else 0.0
+
+        # Penalize for anti-keywords
+        if found_anti:
+            score *= 0.5
+
+        passed = score >= 0.6 and not found_anti
+
+        return TestResult(
+            test_name=test.name,
+            expert=expert,
+            passed=passed,
+            score=score,
+            response=response[:500],  # Truncate for report
+            latency_ms=latency_ms,
+            missing_keywords=missing_keywords,
+            found_anti_keywords=found_anti,
+            cached=cached,
+        )
+
     async def evaluate_expert(
         self,
         expert: str,
         model_id: str,
         tests: list[TestCase],
     ) -> list[TestResult]:
-        """Evaluate an expert on a test suite."""
+        """Evaluate an expert on a test suite.
+
+        Results are returned, not recorded; callers pass them to record().
+        """
+        # Tests are independent requests, so run them all at once (run_test
+        # bounds how many are in flight)
+        results = await asyncio.gather(*(self.run_test(expert, model_id, test) for test in tests))
+
+        # Log once the suite is done so each expert's output stays together
         logger.info(f"\n{'='*60}")
         logger.info(f"Evaluating {expert} ({model_id})")
         logger.info(f"{'='*60}")
 
-        results = []
-        for i, test in enumerate(tests):
+        for i, (test, result) in enumerate(zip(tests, results)):
             logger.info(f"  [{i+1}/{len(tests)}] {test.name}...")
-            result = await self.run_test(expert, model_id, test)
-            results.append(result)
-            self.results.append(result)
-
             status = "✓" if result.passed else "✗"
-            logger.info(f"    {status} Score: {result.score:.2f} ({result.latency_ms:.0f}ms)")
+            latency = "cached" if result.cached else f"{result.latency_ms:.0f}ms"
+            logger.info(f"    {status} Score: {result.score:.2f} ({latency})")
             if result.missing_keywords:
                 logger.info(f"    Missing: {result.missing_keywords}")
             if result.error:
@@ -416,64 +604,100 @@ class TriforceEvaluator:
         avg_score = sum(r.score for r in results) / len(results) if results else 0
         logger.info(f"\n  Summary: {passed}/{len(tests)} passed, avg score: {avg_score:.2f}")
 
-        return results
+        return list(results)
+
+    def record(self, expert: str, results: list[TestResult]) -> None:
+        """Add an expert's results to self.results, grouped by expert for the gap report."""
+        self.results.extend(results)
+        self.results_by_expert.setdefault(expert, []).extend(results)
+        self._gap_report = None
+
+    async def run_expert_evaluation(self, expert: str) -> dict[str, Any]:
+        """Run evaluation on a single expert."""
+        model_id, tests = EXPERTS[expert]
+        results = await self.evaluate_expert(expert, model_id, tests)
+        self.record(expert, results)
+        return {expert: self._summarize(model_id, tests, results)}
 
     async def run_full_evaluation(self) -> dict[str, Any]:
         """Run evaluation on all experts."""
-        experts = {
-            "nayru": ("nayru-v7:latest", NAYRU_TESTS),
-            "din": ("din-v4:latest", DIN_TESTS),
-            "farore": ("farore-v4:latest", FARORE_TESTS),
-            "veran": ("veran-v2:latest", VERAN_TESTS),
-            "onox": ("onox-v1:latest", ONOX_TESTS),
-            "twinrova": ("twinrova-v1:latest", TWINROVA_TESTS),
-            "agahnim": ("agahnim-v1:latest", AGAHNIM_TESTS),
-        }
+        # Each expert has its own model, so run the suites concurrently
+        expert_slots = asyncio.Semaphore(self.max_parallel_experts or len(EXPERTS))
+
+        async def run_suite(expert: str, model_id: str, tests: list[TestCase]) -> list[TestResult]:
+            async with expert_slots:
+                return await self.evaluate_expert(expert, model_id, tests)
 
+        expert_results = await asyncio.gather(*(
+            run_suite(expert, model_id, tests)
+            for expert, (model_id, tests) in EXPERTS.items()
+        ))
+
+        # Merge in suite order, independent of which expert finished first
         all_results = {}
-        for expert, (model_id, tests) in experts.items():
-            results = await self.evaluate_expert(expert, model_id, tests)
-            all_results[expert] = {
-                "model_id": model_id,
-                "tests": len(tests),
-                "passed": sum(1 for r in results if r.passed),
-                "avg_score": sum(r.score for r in results) / len(results) if results else 0,
-                "avg_latency_ms": sum(r.latency_ms for r in results) / len(results) if results else 0,
-                "details": [
-                    {
-                        "name": r.test_name,
-                        "passed": r.passed,
-                        "score": r.score,
-                        "missing": r.missing_keywords,
-                        "response_preview": r.response[:200],
-                    }
-                    for r in results
-                ],
-            }
+        for (expert, (model_id, tests)), results in zip(EXPERTS.items(), expert_results):
+            self.record(expert, results)
+            all_results[expert] = self._summarize(model_id, tests, results)
 
         return all_results
 
+    @staticmethod
+    def _summarize(model_id: str, tests: list[TestCase], results: list[TestResult]) -> dict[str, Any]:
+        """Aggregate one expert's results for the results JSON.
+
+        Cached results are left out of avg_latency_ms, as their latencies are from earlier runs.
+        """
+        timed = [r.latency_ms for r in results if not r.cached]
+        return {
+            "model_id": model_id,
+            "tests": len(tests),
+            "passed": sum(1 for r in results if r.passed),
+            "avg_score": sum(r.score for r in results) / len(results) if results else 0,
+            "cached": len(results) - len(timed),
+            "avg_latency_ms": sum(timed) / len(timed) if timed else 0,
+            "details": [
+                {
+                    "name": r.test_name,
+                    "passed": r.passed,
+                    "score": r.score,
+                    "missing": r.missing_keywords,
+                    "response_preview": r.response[:200],
+                }
+                for r in results
+            ],
+        }
+
     def generate_gap_report(self) -> str:
-        """Generate a knowledge gap report from results."""
+        """Generate a knowledge gap report from results.
+
+        The report is reused until more results are recorded.
+        """
+        if self._gap_report is not None and self._gap_report[0] == len(self.results):
+            return self._gap_report[1]
+
         report = []
         report.append("# Triforce Expert Knowledge Gap Analysis")
         report.append(f"\n*Generated: {datetime.now().isoformat()}*\n")
 
-        # Group by expert
-        by_expert: dict[str, list[TestResult]] = {}
-        for r in self.results:
-            by_expert.setdefault(r.expert, []).append(r)
-
-        for expert, results in by_expert.items():
-            passed = sum(1 for r in results if r.passed)
+        # Results are already grouped by expert; tally each group in one pass
+        for expert, results in self.results_by_expert.items():
             total = len(results)
-            avg = sum(r.score for r in results) / total if total else 0
+            passed = 0
+            score_sum = 0.0
+            failed = []
+            missing = Counter()
+            for r in results:
+                passed += r.passed
+                score_sum += r.score
+                if not r.passed:
+                    failed.append(r)
+                missing.update(r.missing_keywords)
+            avg = score_sum / total if total else 0
 
             report.append(f"\n## {expert.title()}")
             report.append(f"\n**Overall:** {passed}/{total} tests passed ({avg*100:.1f}%)\n")
 
             # Failed tests
-            failed = [r for r in results if not r.passed]
             if failed:
                 report.append("### Knowledge Gaps\n")
                 for r in failed:
@@ -488,18 +712,14 @@ class TriforceEvaluator:
                     report.append(f"- **Response preview:** `{r.response[:150]}...`\n")
 
             # Identify patterns
-            missing_all = []
-            for r in results:
-                missing_all.extend(r.missing_keywords)
-
-            if missing_all:
-                from collections import Counter
-                common = Counter(missing_all).most_common(5)
+            common = missing.most_common(5)
+            if common:
                 report.append("### Most Commonly Missing Concepts\n")
                 for concept, count in common:
                     report.append(f"- `{concept}` (missing {count}x)")
 
-        return "\n".join(report)
+        self._gap_report = (len(self.results), "\n".join(report))
+        return self._gap_report[1]
 
 
 async def main():
@@ -507,43 +727,48 @@ async def main():
     import argparse
 
     parser = argparse.ArgumentParser(description="Evaluate Triforce expert models")
-    parser.add_argument("--expert", choices=["nayru", "din", "farore", "veran", "onox", "twinrova", "agahnim", "all"], default="all")
+    parser.add_argument("--expert", choices=[*EXPERTS, "all"], default="all")
     parser.add_argument("--verbose", "-v", action="store_true")
     parser.add_argument("--output", "-o", default="triforce_eval_results.json")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip tests that already succeeded in the results log (the --output path with a .log.jsonl suffix)",
+    )
+    parser.add_argument("--max-concurrency", type=int, default=8, help="Maximum in-flight model requests")
+    parser.add_argument(
+        "--max-parallel-experts",
+        type=int,
+        help="Maximum expert suites to run at once (default: all), if the backend can't hold every model",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Query every model even if {RESPONSE_CACHE} has a response for its current digest",
+    )
     args = parser.parse_args()
 
-    evaluator = TriforceEvaluator(verbose=args.verbose)
-
-    if args.expert == "all":
-        results = await evaluator.run_full_evaluation()
-    else:
-        experts = {
-            "nayru": ("nayru-v7:latest", NAYRU_TESTS),
-            "din": ("din-v4:latest", DIN_TESTS),
-            "farore": ("farore-v4:latest", FARORE_TESTS),
-            "veran": ("veran-v2:latest", VERAN_TESTS),
-            "onox": ("onox-v1:latest", ONOX_TESTS),
-            "twinrova": ("twinrova-v1:latest", TWINROVA_TESTS),
-            "agahnim": ("agahnim-v1:latest", AGAHNIM_TESTS),
-        }
-        model_id, tests = experts[args.expert]
-        eval_results = await evaluator.evaluate_expert(args.expert, model_id, tests)
-        results = {
-            args.expert: {
-                "model_id": model_id,
-                "tests": len(tests),
-                "passed": sum(1 for r in eval_results if r.passed),
-                "avg_score": sum(r.score for r in eval_results) / len(eval_results),
-                "details": [
-                    {"name": r.test_name, "passed": r.passed, "score": r.score}
-                    for r in eval_results
-                ],
-            }
-        }
+    evaluator = TriforceEvaluator(
+        verbose=args.verbose,
+        max_concurrency=args.max_concurrency,
+        max_parallel_experts=args.max_parallel_experts,
+        cache_path=None if args.no_cache else RESPONSE_CACHE,
+        # Not plain .jsonl, which would be the output path itself with -o results.jsonl
+        results_log=Path(args.output).with_suffix(".log.jsonl"),
+        resume=args.resume,
+    )
+
+    try:
+        if args.expert == "all":
+            results = await evaluator.run_full_evaluation()
+        else:
+            results = await evaluator.run_expert_evaluation(args.expert)
+    finally:
+        evaluator.close()
 
     # Save results
     output_path = Path(args.output)
-    output_path.write_text(json.dumps(results, indent=2))
+    output_path.write_bytes(dumps_indented(results))
     logger.info(f"\nResults saved to {output_path}")
 
     # Generate gap report
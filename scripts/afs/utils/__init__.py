@@ -0,0 +1 @@
+"""Helpers shared by the AFS scripts (import with scripts/afs on sys.path)."""
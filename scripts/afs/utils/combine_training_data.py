@@ -1,62 +1,59 @@
 #!/usr/bin/env python3
 """Combine training datasets with register-emphasis examples first."""
 
-import json
+import sys
 from pathlib import Path
 
-def load_jsonl(path):
-    """Load JSONL file."""
-    examples = []
-    with open(path) as f:
+# Add scripts/afs to path for the shared utils
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from utils.jsonio import json_loads
+
+
+def iter_jsonl(path):
+    """Yield (raw line, parsed record) pairs from a JSONL file."""
+    with open(path, "rb") as f:
         for line in f:
             if line.strip():
-                examples.append(json.loads(line))
-    return examples
+                if not line.endswith(b"\n"):
+                    line += b"\n"
+                yield line, json_loads(line)
 
 
 def main():
     models_dir = Path(__file__).parent.parent.parent / "models"
+    output_file = models_dir / "veran_snes_hardware_v2.jsonl"
 
-    # Load datasets
-    register_data = load_jsonl(models_dir / "veran_register_emphasis.jsonl")
-    original_data = load_jsonl(models_dir / "veran_snes_hardware.jsonl")
-
-    print(f"Register-emphasis examples: {len(register_data)}")
-    print(f"Original examples: {len(original_data)}")
-
-    # Track codes we've already added
+    # Stream both sources straight into the output: register-emphasis FIRST,
+    # then original examples whose instruction hasn't been seen. Lines are
+    # written back as-is, so nothing is re-serialized.
     seen_codes = set()
-    for ex in register_data:
-        seen_codes.add(ex["instruction"])
+    categories = {}
+    register_count = original_count = unique_original_count = 0
 
-    # Add original examples that aren't duplicates
-    unique_original = []
-    for ex in original_data:
-        if ex["instruction"] not in seen_codes:
-            unique_original.append(ex)
+    with open(output_file, "wb") as out:
+        for line, ex in iter_jsonl(models_dir / "veran_register_emphasis.jsonl"):
+            register_count += 1
             seen_codes.add(ex["instruction"])
-
-    print(f"Unique original examples to add: {len(unique_original)}")
-
-    # Combine: register-emphasis FIRST, then original
-    combined = register_data + unique_original
-
-    print(f"Total combined: {len(combined)}")
-
-    # Save combined dataset
-    output_file = models_dir / "veran_snes_hardware_v2.jsonl"
-    with open(output_file, "w") as f:
-        for ex in combined:
-            f.write(json.dumps(ex) + "\n")
-
+            out.write(line)
+            cat = ex.get("category", "unknown")
+            categories[cat] = categories.get(cat, 0) + 1
+
+        for line, ex in iter_jsonl(models_dir / "veran_snes_hardware.jsonl"):
+            original_count += 1
+            if ex["instruction"] in seen_codes:
+                continue
+            seen_codes.add(ex["instruction"])
+            unique_original_count += 1
+            out.write(line)
+            cat = ex.get("category", "unknown")
+            categories[cat] = categories.get(cat, 0) + 1
+
+    print(f"Register-emphasis examples: {register_count}")
+    print(f"Original examples: {original_count}")
+    print(f"Unique original examples to add: {unique_original_count}")
+    print(f"Total combined: {register_count + unique_original_count}")
     print(f"\nSaved to: {output_file}")
 
-    # Show category breakdown
-    categories = {}
-    for ex in combined:
-        cat = ex.get("category", "unknown")
-        categories[cat] = categories.get(cat, 0) + 1
-
     print("\nCategory breakdown:")
     for cat, count in sorted(categories.items()):
         print(f"  {cat}: {count}")
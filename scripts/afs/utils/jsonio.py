@@ -0,0 +1,35 @@
+"""JSON helpers shared by the AFS scripts.
+
+orjson is used when it is installed; the stdlib fallbacks produce the same
+compact, UTF-8 output so files don't depend on which one ran.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # optional speedup; fall back to stdlib json
+    orjson = None
+
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+def dumps_bytes(obj) -> bytes:
+    """Serialize one value as compact JSON bytes."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def dumps_line(obj) -> bytes:
+    """Serialize one JSONL record, including the trailing newline."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return dumps_bytes(obj) + b"\n"
+
+
+def dumps_indented(obj) -> bytes:
+    """Serialize a report as 2-space-indented JSON."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode()
@@ -7,3 +7,7 @@ ROOT = Path(__file__).resolve().parents[1]
 SRC = ROOT / "src"
 if str(SRC) not in sys.path:
     sys.path.insert(0, str(SRC))
+# Standalone scripts import their shared helpers as utils.*
+SCRIPTS = ROOT / "scripts" / "afs"
+if str(SCRIPTS) not in sys.path:
+    sys.path.insert(0, str(SCRIPTS))
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import importlib.util
+import random
+import sys
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "afs" / "data_gen" / "extract_chat_training.py"
+
+
+@pytest.fixture(params=["numpy", "pure-python"])
+def extract(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> ModuleType:
+    # The script creates its output directory under $HOME at import
+    monkeypatch.setenv("HOME", str(tmp_path))
+    spec = importlib.util.spec_from_file_location("extract_chat_training", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    if request.param == "numpy" and module.np is None:
+        pytest.skip("numpy not installed")
+    if request.param == "pure-python":
+        monkeypatch.setattr(module, "np", None)
+    return module
+
+
+def _random_samples(count: int, words: int = 200) -> list[dict]:
+    rng = random.Random(0)
+    vocab = ["".join(rng.choices("abcdefghijklmnopqrstuvwxyz", k=rng.randint(2, 9))) for _ in range(3000)]
+    return [
+        {"instruction": " ".join(rng.choices(vocab, k=words // 2)), "output": " ".join(rng.choices(vocab, k=words // 2))}
+        for _ in range(count)
+    ]
+
+
+def test_dedupe_keeps_unrelated_samples(extract: ModuleType) -> None:
+    samples = _random_samples(40)
+
+    assert extract.dedupe(samples) == samples
+
+
+def test_dedupe_drops_whitespace_and_punctuation_near_duplicate(extract: ModuleType) -> None:
+    original, other = _random_samples(2, words=600)
+    words = original["output"].split()
+    words[100] += ","
+    near_duplicate = {
+        "instruction": "  " + original["instruction"].replace(" ", "\n  "),
+        "output": " ".join(words),
+    }
+
+    assert extract.dedupe([original, near_duplicate, other]) == [original, other]
+
+
+def test_dedupe_drops_exact_duplicates_and_empty_instructions(extract: ModuleType) -> None:
+    first, second = _random_samples(2)
+
+    assert extract.dedupe([first, {"instruction": "", "output": "x"}, second, dict(first)]) == [first, second]
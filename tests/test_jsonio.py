@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import pytest
+
+from utils import jsonio
+
+
+RECORD = {"instruction": "Explain LDA #$00", "output": "Loads zero — 8-bit", "tags": ["asm", 1, 2.5, None, True]}
+
+
+def test_dumps_line_round_trips() -> None:
+    line = jsonio.dumps_line(RECORD)
+
+    assert line.endswith(b"\n")
+    assert jsonio.json_loads(line) == RECORD
+
+
+def test_stdlib_fallback_matches_orjson(monkeypatch: pytest.MonkeyPatch) -> None:
+    if jsonio.orjson is None:
+        pytest.skip("orjson not installed")
+    fast = (jsonio.dumps_bytes(RECORD), jsonio.dumps_line(RECORD), jsonio.dumps_indented(RECORD))
+
+    monkeypatch.setattr(jsonio, "orjson", None)
+
+    assert (jsonio.dumps_bytes(RECORD), jsonio.dumps_line(RECORD), jsonio.dumps_indented(RECORD)) == fast
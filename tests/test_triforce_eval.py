@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import importlib.util
+import sys
+from dataclasses import asdict
+from pathlib import Path
+from types import ModuleType
+
+import pytest
+
+SCRIPT = Path(__file__).resolve().parents[1] / "scripts" / "afs" / "evaluation" / "triforce_eval.py"
+
+
+@pytest.fixture
+def triforce(monkeypatch: pytest.MonkeyPatch) -> ModuleType:
+    pytest.importorskip("afs.agent")
+    spec = importlib.util.spec_from_file_location("triforce_eval", SCRIPT)
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_load_completed_skips_errors_and_truncated_lines(triforce: ModuleType, tmp_path: Path) -> None:
+    passed = triforce.TestResult("a", "nayru", True, 1.0, "ok", 10.0)
+    errored = triforce.TestResult("b", "nayru", False, 0.0, "", 5.0, error="timeout")
+    truncated = triforce.TestResult("c", "din", True, 1.0, "ok", 10.0)
+    log = tmp_path / "results.log.jsonl"
+    log.write_bytes(
+        triforce.dumps_line(asdict(passed))
+        + triforce.dumps_line(asdict(errored))
+        + triforce.dumps_line(asdict(truncated))[:20]  # cut short by a crash
+    )
+
+    completed = triforce.load_completed(log)
+
+    # Only the successful result is kept; the errored and truncated tests run again
+    assert completed == {("nayru", "a"): passed}